@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of the page-aware chunker against the fixed-window `chunk_text`.
+
+Reports run time, chunk count and the share of chunks that end on a
+sentence boundary, over synthetic multi-page text.
+
+    PYTHONPATH=./ python -m benchmarks.chunking --pages 2000
+"""
+import argparse
+import random
+import time
+
+from src.pdf_tools.pdf_extractor import chunk_text, iter_page_chunks
+
+WORDS = "the agent reads every page of the manual and indexes clause 4.2 of part A-113 before answering".split()
+
+
+def make_pages(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    pages = []
+    for page_number in range(1, count + 1):
+        paragraphs = []
+        for _ in range(rng.randint(2, 5)):
+            sentences = [" ".join(rng.choices(WORDS, k=rng.randint(6, 30))).capitalize() + "." for _ in range(rng.randint(2, 6))]
+            paragraphs.append("\n".join(sentences))
+        pages.append((page_number, "\n\n".join(paragraphs) + "\n"))
+    return pages
+
+
+def sentence_end_ratio(chunks):
+    return sum(chunk.rstrip().endswith(".") for chunk in chunks) / max(1, len(chunks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages)
+    text = "".join(page_text for _, page_text in pages)
+
+    results = {}
+    for name, run in (
+        ("chunk_text", lambda: chunk_text(text)),
+        ("iter_page_chunks", lambda: [chunk["text"] for chunk in iter_page_chunks(pages)]),
+    ):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            chunks = run()
+            best = min(best, time.perf_counter() - start)
+        results[name] = (best, chunks)
+
+    print(f"{len(text):,} characters over {args.pages} pages")
+    print(f"{'chunker':>18} {'ms':>9} {'chunks':>8} {'sentence ends':>14}")
+    for name, (elapsed, chunks) in results.items():
+        print(f"{name:>18} {elapsed * 1000:>9.1f} {len(chunks):>8} {sentence_end_ratio(chunks):>13.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+CPU time of the extraction phase of `translate_pdf`.
+
+"legacy" repeats what the translator used to do per page: `get_text()` on
+the previous and next page plus `get_text('blocks')` and `get_text('dict')`
+on the page itself. "single-pass" is `iter_page_work`, which extracts every
+page once and slides a window over the results.
+
+The second table is the wall-clock time of `map_pages` with the translator's
+page extractor for different numbers of worker processes. Worker CPU time is
+not counted by `process_time`, so it compares wall-clock time; 1 worker
+extracts in this process. Process start-up is excluded by a warm-up run.
+
+    PYTHONPATH=./ python -m benchmarks.extraction --pages 200
+    PYTHONPATH=./ python -m benchmarks.extraction --pages 3000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from benchmarks.utils import iter_page_work, make_sample_pdf
+from src.pdf_tools import parallel_extraction
+from src.pdf_translation.extraction import extract_page
+
+
+def legacy_extract(source: fitz.Document) -> int:
+    blocks = 0
+    for page_num in range(len(source)):
+        page = source.load_page(page_num)
+        if page_num > 0:
+            source.load_page(page_num - 1).get_text()
+        if page_num < len(source) - 1:
+            source.load_page(page_num + 1).get_text()
+        raw_blocks = page.get_text('blocks')
+        page.get_text('dict')
+        blocks += sum(1 for block in raw_blocks if block[6] == 0 and block[4].strip())
+    return blocks
+
+
+def single_pass_extract(source: fitz.Document) -> int:
+    return sum(len(work.blocks) for work in iter_page_work(source))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks-per-page", type=int, default=8)
+    parser.add_argument("--words-per-block", type=int, default=60)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_pdf = os.path.join(tmp, "input.pdf")
+        make_sample_pdf(input_pdf, args.pages, blocks_per_page=args.blocks_per_page, words_per_block=args.words_per_block)
+
+        print(f"{'method':>12} {'cpu s':>8} {'blocks':>7}")
+        for name, extract in (("legacy", legacy_extract), ("single-pass", single_pass_extract)):
+            source = fitz.open(input_pdf)
+            start = time.process_time()
+            blocks = extract(source)
+            elapsed = time.process_time() - start
+            source.close()
+            print(f"{name:>12} {elapsed:>8.2f} {blocks:>7}")
+
+        # Every page count is large enough for the process pool.
+        parallel_extraction.EXTRACTION_PARALLEL_MIN_PAGES = 0
+        print(f"\n{'workers':>7} {'wall s':>8} {'speedup':>8} {'blocks':>7}")
+        baseline = None
+        for workers in args.workers:
+            if workers > 1:
+                sum(1 for _ in parallel_extraction.map_pages(input_pdf, extract_page, workers=workers))
+            start = time.perf_counter()
+            blocks = sum(len(page.blocks) for page in parallel_extraction.map_pages(input_pdf, extract_page, workers=workers))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>7} {elapsed:>8.2f} {baseline / elapsed:>8.2f} {blocks:>7}")
+
+
+if __name__ == "__main__":
+    main()
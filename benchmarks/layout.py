@@ -0,0 +1,109 @@
+"""
+Time to lay out translated blocks: offline fit solver vs. the old retry loop.
+
+The old loop called `insert_textbox` up to 10 times per block, shrinking the
+font by 10% after each overflow. The solver measures the text with
+`fitz.Font` and inserts once. Translations are simulated by making every block
+longer, as in a translation into German.
+
+    PYTHONPATH=./ python -m benchmarks.layout --pages 50 --expansion 1.5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from benchmarks.utils import iter_page_work, make_sample_pdf
+from src.pdf_translation import pdf_translator
+
+
+def legacy_apply(page, block_metadata_mapping, translated_map, stats):
+    """The insertion loop `_apply_translations` used before the solver."""
+    page.add_redact_annot(page.rect)
+    page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE, graphics=fitz.PDF_REDACT_IMAGE_NONE)
+    for block_idx, bbox, font_size, color_rgb, alpha, font_name in block_metadata_mapping:
+        text = translated_map[block_idx]
+        rect = fitz.Rect(bbox)
+        size = font_size
+        for _ in range(10):
+            stats["inserts"] += 1
+            result = page.insert_textbox(
+                rect, text, fontname=pdf_translator.FONT_NAME, fontfile=pdf_translator.FONT_PATH,
+                fontsize=size, align=0, color=color_rgb, fill_opacity=alpha,
+            )
+            if result >= 0:
+                stats["sizes"].append(size)
+                break
+            size *= 0.9
+            rect.x1 = min(rect.x1 - result, page.rect.x1)
+            if size < 5:
+                stats["failed"] += 1
+                break
+        else:
+            stats["failed"] += 1
+
+
+def solver_apply(page, block_metadata_mapping, translated_map, stats):
+    original_insert = page.insert_textbox
+
+    def counting_insert(*args, **kwargs):
+        stats["inserts"] += 1
+        stats["sizes"].append(kwargs["fontsize"])
+        result = original_insert(*args, **kwargs)
+        if result < 0:
+            stats["failed"] += 1
+        return result
+
+    page.insert_textbox = counting_insert
+    pdf_translator._apply_translations(page, page.number, block_metadata_mapping, translated_map)
+
+
+def expand(text: str, factor: float) -> str:
+    words = text.split()
+    extra = int(len(words) * (factor - 1))
+    return " ".join(words + [word + "en" for word in words[:extra]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--blocks-per-page", type=int, default=8)
+    parser.add_argument("--words-per-block", type=int, default=60)
+    parser.add_argument("--expansion", type=float, default=1.5, help="Length of the fake translation relative to the source.")
+    args = parser.parse_args()
+
+    if not os.path.exists(pdf_translator.FONT_PATH):
+        # Fall back to a base-14 font so the benchmark runs without the CJK font installed.
+        pdf_translator.FONT_NAME, pdf_translator.FONT_PATH = 'helv', None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_pdf = os.path.join(tmp, "input.pdf")
+        make_sample_pdf(input_pdf, args.pages, blocks_per_page=args.blocks_per_page, words_per_block=args.words_per_block)
+
+        source = fitz.open(input_pdf)
+        prepared = []
+        for work in iter_page_work(source):
+            prepared.append((work.block_metadata_mapping, {block['id']: expand(block['text'], args.expansion) for block in work.blocks}))
+        source.close()
+
+        print(f"{'method':>8} {'seconds':>9} {'inserts':>8} {'failed':>7} {'mean pt':>8} {'min pt':>7} {'max pt':>7}")
+        for name, apply in (("loop", legacy_apply), ("solver", solver_apply)):
+            stats = {"inserts": 0, "failed": 0, "sizes": []}
+            doc = fitz.open(input_pdf)
+            start = time.perf_counter()
+            for page_num, (metadata, translated_map) in enumerate(prepared):
+                apply(doc.load_page(page_num), metadata, translated_map, stats)
+            elapsed = time.perf_counter() - start
+            doc.close()
+            sizes = stats["sizes"] or [0]
+            print(
+                f"{name:>8} {elapsed:>9.2f} {stats['inserts']:>8} {stats['failed']:>7} "
+                f"{statistics.mean(sizes):>8.2f} {min(sizes):>7.2f} {max(sizes):>7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
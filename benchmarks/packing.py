@@ -0,0 +1,64 @@
+"""
+Request count and wall-clock time of `translate_pdf` for different pack budgets.
+
+Uses a sparse, slide-like document (a couple of short blocks per page) and a
+fake translator with a fixed latency per request. A budget of 0 is the old
+one-request-per-page behaviour.
+
+    PYTHONPATH=./ python -m benchmarks.packing --pages 60 --latency 0.2
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.utils import make_sample_pdf
+from src.pdf_translation import pdf_translator
+
+
+def fake_translate_text(latency: float, counter: list):
+    lock = threading.Lock()
+
+    def translate_text(blocks, target_language, previous_pages, next_pages):
+        with lock:
+            counter[0] += 1
+        time.sleep(latency)
+        return {block['id']: block['text'].upper() for block in blocks}
+    return translate_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--blocks-per-page", type=int, default=2)
+    parser.add_argument("--words-per-block", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake model latency per request in seconds.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 500, 1500, 4000])
+    args = parser.parse_args()
+
+    counter = [0]
+    pdf_translator.translate_text = fake_translate_text(args.latency, counter)
+    if not os.path.exists(pdf_translator.FONT_PATH):
+        # Fall back to a base-14 font so the benchmark runs without the CJK font installed.
+        pdf_translator.FONT_NAME, pdf_translator.FONT_PATH = 'helv', None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_pdf = os.path.join(tmp, "input.pdf")
+        make_sample_pdf(input_pdf, args.pages, blocks_per_page=args.blocks_per_page, words_per_block=args.words_per_block)
+
+        print(f"{'budget':>7} {'requests':>9} {'seconds':>9}")
+        for budget in args.budgets:
+            counter[0] = 0
+            start = time.perf_counter()
+            pdf_translator.translate_pdf(
+                "German", input_pdf, os.path.join(tmp, f"out-{budget}.pdf"), max_workers=args.workers, pack_tokens=budget,
+                checkpoint_dir=os.path.join(tmp, "jobs"),
+            )
+            elapsed = time.perf_counter() - start
+            print(f"{budget:>7} {counter[0]:>9} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
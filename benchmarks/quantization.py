@@ -0,0 +1,72 @@
+"""
+Recall@k versus memory for truncated and quantized vector indexes.
+
+For every combination of dimension and quantization, a `NumpyVectorStore`
+is built and its top-k results are compared with an exact float32 search
+over the full-size vectors. Memory is the RAM taken by the search index
+(disk-backed rescoring vectors excluded).
+
+By default the corpus is synthetic, with per-dimension variance decaying
+like a Matryoshka embedding. Pass `--vectors embeddings.npy` to use real
+embeddings; queries are noisy copies of stored vectors.
+
+    PYTHONPATH=./ python -m benchmarks.quantization --size 50000 --dims 3072 768 256
+"""
+import argparse
+
+import numpy as np
+
+from src.agent.embeddings import truncate_embeddings
+from src.agent.numpy_store import QUANTIZATIONS, NumpyVectorStore, normalize_rows
+
+
+def synthetic_vectors(size: int, dim: int, rng) -> np.ndarray:
+    scale = 1.0 / np.sqrt(1.0 + np.arange(dim) / 64.0)
+    return rng.standard_normal((size, dim), dtype=np.float32) * scale.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", help="Optional .npy file of real embeddings.")
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--dims", type=int, nargs="+", default=[3072, 768, 256])
+    parser.add_argument("--quantizations", nargs="+", choices=QUANTIZATIONS, default=list(QUANTIZATIONS))
+    parser.add_argument("--oversampling", type=float, default=4.0)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.vectors:
+        corpus = normalize_rows(np.load(args.vectors, mmap_mode="r")[:args.size])
+    else:
+        corpus = normalize_rows(synthetic_vectors(args.size, max(args.dims), rng))
+    picks = rng.choice(len(corpus), args.queries, replace=False)
+    queries = normalize_rows(corpus[picks] + 0.5 * rng.standard_normal((args.queries, corpus.shape[1]), dtype=np.float32) / np.sqrt(corpus.shape[1]))
+
+    exact = [set(np.argsort(-(corpus @ query))[:args.k].tolist()) for query in queries]
+
+    print(f"{len(corpus):,} vectors, recall@{args.k} against exact full-size float32 search")
+    print(f"{'dim':>6} {'quantization':>13} {'memory MB':>10} {'recall':>8}")
+    for dim in args.dims:
+        if dim > corpus.shape[1]:
+            continue
+        vectors = np.asarray(truncate_embeddings(corpus.tolist(), dim), dtype=np.float32) if dim < corpus.shape[1] else corpus
+        truncated_queries = np.asarray(truncate_embeddings(queries.tolist(), dim), dtype=np.float32) if dim < corpus.shape[1] else queries
+        for quantization in args.quantizations:
+            store = NumpyVectorStore(quantization=quantization, oversampling=args.oversampling)
+            store.create_collection("bench", dim)
+            for start in range(0, len(vectors), 10_000):
+                end = min(start + 10_000, len(vectors))
+                store.upsert("bench", range(start, end), vectors[start:end], [{}] * (end - start))
+
+            hits = 0
+            for query, expected in zip(truncated_queries, exact):
+                found = {point.id for point in store.search("bench", query, args.k)}
+                hits += len(found & expected)
+            print(f"{dim:>6} {quantization:>13} {store.memory_usage() / 2**20:>10.1f} {hits / (args.k * len(queries)):>8.3f}")
+            store.delete_collection("bench")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Output size and save time of translated PDFs, before and after font handling changes.
+
+"before" inserts every block with `fontfile=` and saves with `doc.save(path)`.
+"after" registers the font once per page from a buffer loaded once, and saves
+through `save_translated_pdf` (font subsetting, garbage collection, deflate).
+Without the NotoSansCJK font installed, MuPDF's built-in CJK fallback font
+is written to a temporary file and used instead.
+
+    PYTHONPATH=./ python -m benchmarks.save --pages 50
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from benchmarks.utils import iter_page_work, make_sample_pdf
+from src.pdf_translation import pdf_translator
+
+
+def apply_before(doc, pages):
+    for page_num, (metadata, translated_map) in enumerate(pages):
+        page = doc.load_page(page_num)
+        page.add_redact_annot(page.rect)
+        page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE, graphics=fitz.PDF_REDACT_IMAGE_NONE)
+        for block_idx, bbox, font_size, color_rgb, alpha, font_name in metadata:
+            page.insert_textbox(
+                fitz.Rect(bbox), translated_map[block_idx], fontname=pdf_translator.FONT_NAME,
+                fontfile=pdf_translator.FONT_PATH, fontsize=font_size * 0.8, color=color_rgb,
+            )
+
+
+def apply_after(doc, pages):
+    for page_num, (metadata, translated_map) in enumerate(pages):
+        pdf_translator._apply_translations(doc.load_page(page_num), page_num, metadata, translated_map)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--blocks-per-page", type=int, default=6)
+    parser.add_argument("--words-per-block", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not os.path.exists(pdf_translator.FONT_PATH):
+            pdf_translator.FONT_PATH = os.path.join(tmp, "fallback-cjk.ttf")
+            with open(pdf_translator.FONT_PATH, "wb") as f:
+                f.write(fitz.Font("cjk").buffer)
+
+        input_pdf = os.path.join(tmp, "input.pdf")
+        make_sample_pdf(input_pdf, args.pages, blocks_per_page=args.blocks_per_page, words_per_block=args.words_per_block)
+
+        source = fitz.open(input_pdf)
+        pages = [
+            (work.block_metadata_mapping, {block['id']: block['text'] + " 翻译" for block in work.blocks})
+            for work in iter_page_work(source)
+        ]
+        source.close()
+
+        print(f"{'method':>7} {'apply s':>8} {'save s':>7} {'size MB':>8}")
+        for name, apply in (("before", apply_before), ("after", apply_after)):
+            output_pdf = os.path.join(tmp, f"{name}.pdf")
+            doc = fitz.open(input_pdf)
+            start = time.perf_counter()
+            apply(doc, pages)
+            applied = time.perf_counter()
+            if name == "before":
+                doc.save(output_pdf)
+            else:
+                pdf_translator.save_translated_pdf(doc, output_pdf)
+            saved = time.perf_counter()
+            doc.close()
+            print(f"{name:>7} {applied - start:>8.2f} {saved - applied:>7.2f} {os.path.getsize(output_pdf) / 2**20:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Wall-clock benchmark of `translate_pdf` with different worker counts.
+
+The translator model is replaced by a fake that sleeps for a fixed latency,
+and packing is disabled so that every page is one request, so the numbers
+only reflect how well page requests are overlapped.
+
+    PYTHONPATH=./ python -m benchmarks.translate_concurrency --pages 40 --latency 0.5
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.utils import make_sample_pdf
+from src.pdf_translation import pdf_translator
+
+
+def fake_translate_text(latency: float):
+    def translate_text(blocks, target_language, previous_pages, next_pages):
+        time.sleep(latency)
+        return {block['id']: block['text'].upper() for block in blocks}
+    return translate_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake model latency per request in seconds.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    pdf_translator.translate_text = fake_translate_text(args.latency)
+    if not os.path.exists(pdf_translator.FONT_PATH):
+        # Fall back to a base-14 font so the benchmark runs without the CJK font installed.
+        pdf_translator.FONT_NAME, pdf_translator.FONT_PATH = 'helv', None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_pdf = os.path.join(tmp, "input.pdf")
+        make_sample_pdf(input_pdf, args.pages)
+
+        baseline = None
+        print(f"{'workers':>8} {'seconds':>10} {'speedup':>8}")
+        for workers in args.workers:
+            start = time.perf_counter()
+            pdf_translator.translate_pdf(
+                "German", input_pdf, os.path.join(tmp, f"out-{workers}.pdf"), max_workers=workers, pack_tokens=0,
+                checkpoint_dir=os.path.join(tmp, "jobs"),
+            )
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>10.2f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
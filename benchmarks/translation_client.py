@@ -0,0 +1,56 @@
+"""
+Throughput of `TranslationClient` against a fake model that rate-limits.
+
+The fake model accepts at most `--capacity` concurrent requests and answers
+anything beyond that with a 429 carrying a retry hint, like the Gemini API
+does. The table shows how many 429s the adaptive concurrency limit runs into
+and where the limit settles, for different concurrency ceilings.
+
+    PYTHONPATH=./ python -m benchmarks.translation_client --requests 200 --capacity 4
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.agent.translation_client import TranslationClient
+from tests.fakes import RateLimitError, fake_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--capacity", type=int, default=4, help="Concurrent requests the fake model accepts.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake model latency per request in seconds.")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry hint sent with each 429, in seconds.")
+    parser.add_argument("--max-concurrency", type=int, nargs="+", default=[2, 4, 8, 16])
+    parser.add_argument("--callers", type=int, default=16, help="Threads submitting requests, like page workers.")
+    args = parser.parse_args()
+
+    print(f"{'ceiling':>8} {'seconds':>9} {'req/s':>8} {'429s':>6} {'failed':>7} {'final limit':>12}")
+    for ceiling in args.max_concurrency:
+        client = TranslationClient(
+            fake_model(args.capacity, args.latency, args.retry_after),
+            max_concurrency=ceiling,
+            max_retries=20,
+        )
+
+        def call(i):
+            try:
+                client.generate_text(f"block {i}")
+                return True
+            except RateLimitError:
+                return False
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.callers) as executor:
+            results = list(executor.map(call, range(args.requests)))
+        elapsed = time.perf_counter() - start
+        stats = client.stats()
+        print(
+            f"{ceiling:>8} {elapsed:>9.2f} {args.requests / elapsed:>8.1f} {stats['rate_limited']:>6} "
+            f"{results.count(False):>7} {stats['concurrency_limit']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from typing import Iterator
+
+import fitz  # PyMuPDF
+
+from src.pdf_translation.extraction import extract_page
+from src.pdf_translation.packing import PageWork
+from src.pdf_translation.pdf_translator import _window_page_work
+
+
+def make_sample_pdf(path: str, pages: int, blocks_per_page: int = 4, words_per_block: int = 40):
+    """
+    Writes a synthetic text-only PDF used by the benchmarks.
+
+    Args:
+        path: Where to save the PDF.
+        pages: Number of pages.
+        blocks_per_page: Number of separate text blocks on each page.
+        words_per_block: Number of words in each block.
+    """
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        block_height = (page.rect.height - 72) / blocks_per_page
+        for block_idx in range(blocks_per_page):
+            words = [f"page{page_num}word{i}" if i % 7 == 0 else "lorem" for i in range(words_per_block)]
+            rect = fitz.Rect(36, 36 + block_idx * block_height, page.rect.width - 36, 36 + (block_idx + 1) * block_height - 8)
+            page.insert_textbox(rect, " ".join(words) + ".", fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def iter_page_work(source: fitz.Document) -> Iterator[PageWork]:
+    """The translator's pages to translate, extracted from an open document in this process."""
+    return _window_page_work((extract_page(source.load_page(page_num)) for page_num in range(len(source))), len(source))
@@ -0,0 +1,73 @@
+"""
+Query latency and memory of the NumPy vector store against Qdrant local mode.
+
+Random unit vectors are inserted in batches, then the median latency of
+top-k queries is measured. Memory is the growth of traced Python/NumPy
+allocations while building the collection.
+
+    PYTHONPATH=./ python -m benchmarks.vector_store --sizes 10000 100000 1000000 --dim 768
+
+Qdrant local mode at 1M vectors takes a long time to build; use
+`--backends numpy` to skip it.
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from src.agent.numpy_store import NumpyVectorStore
+from src.agent.vector_store import QdrantVectorStore
+
+BACKENDS = {
+    "numpy": NumpyVectorStore,
+    "qdrant-local": lambda: QdrantVectorStore(QdrantClient(":memory:")),
+}
+
+
+def build(store, size: int, dim: int, batch_size: int = 10_000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    store.create_collection("bench", dim)
+    for start in range(0, size, batch_size):
+        count = min(batch_size, size - start)
+        vectors = rng.standard_normal((count, dim), dtype=np.float32)
+        payloads = [{"text": f"chunk {i}"} for i in range(start, start + count)]
+        store.upsert("bench", range(start, start + count), vectors, payloads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    args = parser.parse_args()
+
+    queries = np.random.default_rng(1).standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    print(f"{'backend':>14} {'vectors':>10} {'build s':>9} {'p50 ms':>9} {'memory MB':>10}")
+    for size in args.sizes:
+        for name in args.backends:
+            tracemalloc.start()
+            start = time.perf_counter()
+            store = BACKENDS[name]()
+            build(store, size, args.dim)
+            build_seconds = time.perf_counter() - start
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                store.search("bench", query.tolist(), args.limit)
+                latencies.append(time.perf_counter() - start)
+
+            print(f"{name:>14} {size:>10,} {build_seconds:>9.1f} {statistics.median(latencies) * 1000:>9.2f} {memory / 2**20:>10.1f}")
+            del store
+
+
+if __name__ == "__main__":
+    main()
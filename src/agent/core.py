@@ -1,5 +1,8 @@
 import os
 import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
 from google.adk.agents import Agent
 from google.adk.models import Gemini
 from google.adk.runners import Runner
@@ -8,32 +11,40 @@ from google.adk.artifacts import InMemoryArtifactService
 
 from src.agent import config
 from src.agent.rag import search_pdf
-from src.pdf_translation.pdf_translator import translate_pdf_tool
+from src.agent.session_registry import SessionEntry, session_registry
+from src.pdf_translation.jobs import translate_pdf_tool
 from src.config import logger
 
 
 session_service = InMemorySessionService()
 artifact_service = InMemoryArtifactService()
 app_name = 'agents'
+DEFAULT_TOOLS = (search_pdf, translate_pdf_tool)
 
-def create_agent_runner():
-    logger.info("Creating PDF assistant agent runner.")
+_runner_cache: Dict[Tuple[str, Tuple[str, ...]], Runner] = {}
+_runner_lock = threading.Lock()
+
+
+def create_agent_runner(model_name: Optional[str] = None, tools: Optional[Sequence[Callable]] = None):
+    model_name = model_name or os.getenv("AGENT_MODEL_NAME", "gemini-2.5-flash-lite")
+    tools = list(tools) if tools is not None else list(DEFAULT_TOOLS)
+    logger.info(f"Creating PDF assistant agent runner (model: {model_name}).")
     
     agent = Agent(
         name="pdf_assistant",
         model=Gemini(
-            model=os.getenv("AGENT_MODEL_NAME", "gemini-2.5-flash-lite"),
+            model=model_name,
             retry_options=config.retry,
         ),
         description="A agent that answer questions based on PDF",
-        tools=[search_pdf, translate_pdf_tool],
+        tools=tools,
         instruction="""
         You are a generic PDF assistant.
 
         YOUR CAPIBILITIES: 
-        1. **Answer Questions**: Answer user questions based on PDF. use `search_pdf` tool to find answers.
+        1. **Answer Questions**: Answer user questions based on PDF. use `search_pdf` tool to find answers. when looking up exact terms (part numbers, clause IDs, function names) call it with mode="lexical".
         2. **Generate Quizzes**: If requested generate quiz JSON format (see format below).
-        3. **Translate PDF**: If requested use `translate_pdf_tool`. It will automatually translate entier pdf and show the pdf to user. you must respond with JSON format (see format below). use this tool only if user requested directly to translate all of the pdf.
+        3. **Translate PDF**: If requested use `translate_pdf_tool`. It starts translating the entire pdf in the background and returns a `job_id`; the user sees the progress and the translated pages as they are ready. you must respond with JSON format (see format below). use this tool only if user requested directly to translate all of the pdf.
 
         --- QUIZ FORMAT RULES ---
         if user requested for quiz:
@@ -63,6 +74,7 @@ def create_agent_runner():
         use this EXACT structure:
         {
             "translate_pdf": "Done",
+            "job_id": "<job_id returned by translate_pdf_tool>",
             "model_response": "<your-response>"
         }
 
@@ -83,6 +95,49 @@ def create_agent_runner():
     ) 
 
 
+def get_agent_runner(model_name: Optional[str] = None, tools: Optional[Sequence[Callable]] = None) -> Runner:
+    """
+    Returns a process-wide runner for the given model and tool set, building it on first use.
+
+    Runners keep no per-conversation state (that lives in `session_service`),
+    so one runner is shared by all sessions.
+
+    Args:
+        model_name: Gemini model name. Defaults to `AGENT_MODEL_NAME`.
+        tools: Tool functions for the agent. Defaults to `DEFAULT_TOOLS`.
+
+    Returns:
+        The cached `Runner`.
+    """
+    model_name = model_name or os.getenv("AGENT_MODEL_NAME", "gemini-2.5-flash-lite")
+    tools = tuple(tools) if tools is not None else DEFAULT_TOOLS
+    key = (model_name, tuple(tool.__name__ for tool in tools))
+
+    runner = _runner_cache.get(key)
+    if runner is not None:
+        return runner
+    with _runner_lock:
+        runner = _runner_cache.get(key)
+        if runner is None:
+            start = time.perf_counter()
+            runner = _runner_cache[key] = create_agent_runner(model_name, tools)
+            logger.info(f"Agent runner for {key} built in {(time.perf_counter() - start) * 1000:.1f} ms.")
+    return runner
+
+
+def warm_up_agent_runner(model_name: Optional[str] = None, tools: Optional[Sequence[Callable]] = None):
+    """
+    Builds the default runner and its model API client ahead of the first chat turn.
+    """
+    start = time.perf_counter()
+    runner = get_agent_runner(model_name, tools)
+    try:
+        runner.agent.model.api_client
+    except Exception as e:
+        logger.warning(f"Could not create the model API client during warm-up: {e}")
+    logger.info(f"Agent runner warmed up in {(time.perf_counter() - start) * 1000:.1f} ms.")
+
+
 def init_session(session_id: str, user_id: str):
     logger.info(f"Initializing session for user: {user_id}, session: {session_id}")
 
@@ -114,4 +169,24 @@ def init_session(session_id: str, user_id: str):
         logger.error(f"An unexpected error occurred during session initialization: {e}")
 
 
-        
\ No newline at end of file
+def _release_adk_session(entry: SessionEntry):
+    """
+    Drops a discarded session's conversation and artifacts from the in-memory ADK services.
+
+    Spilled sessions keep them, so a restored session still has its conversation.
+    """
+    if entry.user_id is None:
+        return
+
+    async def _release():
+        keys = await artifact_service.list_artifact_keys(app_name=app_name, user_id=entry.user_id, session_id=entry.session_id)
+        for filename in keys:
+            await artifact_service.delete_artifact(app_name=app_name, user_id=entry.user_id, session_id=entry.session_id, filename=filename)
+        await session_service.delete_session(app_name=app_name, user_id=entry.user_id, session_id=entry.session_id)
+        logger.info(f"Released ADK session {entry.session_id} ({len(keys)} artifacts).")
+
+    asyncio.run(_release())
+
+
+session_registry.on_discard(_release_adk_session)
+
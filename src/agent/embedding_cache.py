@@ -0,0 +1,163 @@
+import glob
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, List
+
+import numpy as np
+
+from src import config as project_config
+from src.config import logger
+
+KEY_SIZE = 32  # sha256 digest
+
+
+class _Shard:
+    """
+    Append-only storage for vectors of one dimension.
+
+    Rows are raw float32 values in `vectors-<dim>.f32`, read through a memory
+    map, and the matching keys are stored in the same order in `keys-<dim>.bin`.
+    """
+
+    def __init__(self, directory: str, dim: int):
+        self.dim = dim
+        self.vectors_path = os.path.join(directory, f"vectors-{dim}.f32")
+        self.keys_path = os.path.join(directory, f"keys-{dim}.bin")
+        self.rows = 0
+        self._mmap = None
+
+    def load_keys(self) -> List[bytes]:
+        if not os.path.exists(self.keys_path) or not os.path.exists(self.vectors_path):
+            return []
+        with open(self.keys_path, "rb") as f:
+            raw = f.read()
+        # Vectors are written before keys, so a crash can only leave extra vector rows behind.
+        rows = min(len(raw) // KEY_SIZE, os.path.getsize(self.vectors_path) // (4 * self.dim))
+        self.rows = rows
+        return [raw[i * KEY_SIZE:(i + 1) * KEY_SIZE] for i in range(rows)]
+
+    def append(self, keys: List[bytes], vectors: np.ndarray) -> int:
+        first_row = self.rows
+        with open(self.vectors_path, "r+b" if os.path.exists(self.vectors_path) else "wb") as f:
+            f.seek(first_row * 4 * self.dim)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.truncate()
+        with open(self.keys_path, "r+b" if os.path.exists(self.keys_path) else "wb") as f:
+            f.seek(first_row * KEY_SIZE)
+            f.write(b"".join(keys))
+            f.truncate()
+        self.rows += len(keys)
+        self._mmap = None
+        return first_row
+
+    def read(self, rows: List[int]) -> np.ndarray:
+        if self._mmap is None:
+            self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        return np.asarray(self._mmap[rows])
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, disk-backed embedding cache.
+
+    Keys are `sha256(model, task_type, text)`, so identical chunks are only
+    ever embedded once, across sessions and uploads.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._shards: Dict[int, _Shard] = {}
+        self._index: Dict[bytes, tuple] = {}  # key -> (dim, row)
+
+        os.makedirs(directory, exist_ok=True)
+        for keys_path in glob.glob(os.path.join(directory, "keys-*.bin")):
+            dim = int(re.search(r"keys-(\d+)\.bin$", keys_path).group(1))
+            shard = self._shards[dim] = _Shard(directory, dim)
+            for row, key in enumerate(shard.load_keys()):
+                self._index[key] = (dim, row)
+        logger.info(f"Embedding cache opened at '{directory}' with {len(self._index)} vectors.")
+
+    @staticmethod
+    def make_key(model: str, task_type: str, text: str) -> bytes:
+        return hashlib.sha256("\0".join((model, task_type, text)).encode("utf-8")).digest()
+
+    def get_many(self, keys: List[bytes]) -> Dict[int, List[float]]:
+        """
+        Looks up several keys.
+
+        Returns:
+            A mapping from the index of each found key in `keys` to its vector.
+        """
+        found = {}
+        with self._lock:
+            rows_by_dim: Dict[int, list] = {}
+            for i, key in enumerate(keys):
+                location = self._index.get(key)
+                if location is not None:
+                    rows_by_dim.setdefault(location[0], []).append((i, location[1]))
+
+            for dim, positions in rows_by_dim.items():
+                vectors = self._shards[dim].read([row for _, row in positions])
+                for (i, _), vector in zip(positions, vectors.tolist()):
+                    found[i] = vector
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, keys: List[bytes], vectors: List[List[float]]):
+        """
+        Stores vectors under their keys. Keys that are already cached are skipped.
+        """
+        with self._lock:
+            new = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self._index:
+                    new[key] = vector
+            if not new:
+                return
+
+            by_dim: Dict[int, list] = {}
+            for key, vector in new.items():
+                by_dim.setdefault(len(vector), []).append((key, vector))
+
+            for dim, items in by_dim.items():
+                shard = self._shards.get(dim)
+                if shard is None:
+                    shard = self._shards[dim] = _Shard(self.directory, dim)
+                first_row = shard.append([key for key, _ in items], np.asarray([vector for _, vector in items], dtype=np.float32))
+                for offset, (key, _) in enumerate(items):
+                    self._index[key] = (dim, first_row + offset)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._index),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """
+    Returns the process-wide embedding cache, or None if it is disabled
+    by setting `EMBEDDING_CACHE_DIR` to an empty string.
+    """
+    global _cache
+    if not project_config.EMBEDDING_CACHE_DIR:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(project_config.EMBEDDING_CACHE_DIR)
+        return _cache
@@ -0,0 +1,303 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Tuple
+
+import google.generativeai as genai
+import numpy as np
+import requests
+
+from src import config as project_config
+from src.agent.embedding_cache import get_embedding_cache
+from src.config import logger
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about 4 characters per token) used for batch sizing."""
+    return len(text) // 4 + 1
+
+
+def make_batches(chunks: List[str], max_items: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """
+    Splits chunks into contiguous batches bounded by item count and estimated tokens.
+
+    A single chunk larger than `max_tokens` gets a batch of its own.
+
+    Returns:
+        A list of `(start, end)` index ranges into `chunks`.
+    """
+    batches = []
+    start, tokens = 0, 0
+    for i, chunk in enumerate(chunks):
+        chunk_tokens = estimate_tokens(chunk)
+        if i > start and (i - start >= max_items or tokens + chunk_tokens > max_tokens):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += chunk_tokens
+    if start < len(chunks):
+        batches.append((start, len(chunks)))
+    return batches
+
+
+def _embed_batch(texts: List[str], model: str, task_type: str) -> List[List[float]]:
+    """
+    Embeds one batch with the configured backend.
+    """
+    # for self hosted embedding model (OpenAI compatible embeddings API)
+    if project_config.EMBEDDING_URL:
+        payload = {
+            "input": texts,
+            "model": project_config.SELFHOSTED_EMBEDDING_MODEL,
+        }
+        response = requests.post(project_config.EMBEDDING_URL, json=payload, timeout=120)
+        response.raise_for_status()
+        data = response.json()['data']
+        embeddings = [item['embedding'] for item in sorted(data, key=lambda item: item.get('index', 0))]
+    else:
+        result = genai.embed_content(
+            model=model,
+            content=texts,
+            task_type=task_type,
+        )
+        embeddings = result['embedding']
+
+    if len(embeddings) != len(texts):
+        raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}.")
+    return embeddings
+
+
+def _embed_batch_with_retry(texts: List[str], model: str, task_type: str, max_retries: int) -> List[List[float]]:
+    """
+    Embeds one batch, retrying only this batch with jittered exponential backoff.
+    """
+    for attempt in range(max_retries):
+        try:
+            return _embed_batch(texts, model, task_type)
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise
+            delay = min(30, 2 ** attempt) * (0.5 + random.random())
+            logger.warning(f"Embedding batch of {len(texts)} failed (attempt {attempt+1}/{max_retries}): {e}. Retrying in {delay:.1f}s.")
+            time.sleep(delay)
+
+
+def truncate_embeddings(embeddings: List[List[float]], dimensions: int) -> List[List[float]]:
+    """
+    Matryoshka truncation: keeps the first `dimensions` components of each
+    embedding and re-normalizes it to unit length.
+
+    Returns the embeddings unchanged if `dimensions` is 0 or not smaller than their size.
+    """
+    if not embeddings or not dimensions or dimensions >= len(embeddings[0]):
+        return embeddings
+    truncated = np.asarray(embeddings, dtype=np.float32)[:, :dimensions]
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (truncated / norms).tolist()
+
+
+def generate_embeddings(
+    chunks: List[str],
+    model: str = "models/gemini-embedding-001",
+    task_type: str = "retrieval_document",
+    dimensions: Optional[int] = None,
+) -> List[List[float]]:
+    """
+    Generates embeddings for a list of text chunks.
+
+    Chunks already in the embedding cache are served from it, and only the
+    misses are sent to the embedding backend and then added to the cache.
+    The cache always holds full-size vectors; truncation happens afterwards.
+
+    Args:
+        chunks: A list of text chunks to embed.
+        model: The name of the embedding model to use.
+        task_type: The Gemini embedding task type.
+        dimensions: Truncate embeddings to this size (see `truncate_embeddings`).
+            Defaults to `EMBEDDING_DIM`, 0 keeps the full size.
+
+    Returns:
+        A list of embeddings, where each embedding is a list of floats.
+        Empty if any batch still fails after all retries.
+    """
+    if not chunks:
+        return []
+
+    dimensions = project_config.EMBEDDING_DIM if dimensions is None else dimensions
+    return truncate_embeddings(_embed_cached(chunks, model, task_type), dimensions)
+
+
+def _embed_cached(chunks: List[str], model: str, task_type: str) -> List[List[float]]:
+    """
+    Embeds chunks, serving hits from the embedding cache and embedding each distinct miss once.
+    """
+    cache = get_embedding_cache()
+    if cache is None:
+        return _embed_uncached(chunks, model, task_type)
+
+    # The self-hosted backend ignores `model`, so key its vectors by what actually produced them.
+    cache_model = f"{project_config.EMBEDDING_URL}|{project_config.SELFHOSTED_EMBEDDING_MODEL}" if project_config.EMBEDDING_URL else model
+    keys = [cache.make_key(cache_model, task_type, chunk) for chunk in chunks]
+    embeddings = cache.get_many(keys)
+
+    # Embed each distinct missing chunk once
+    missing = {}
+    for i, key in enumerate(keys):
+        if i not in embeddings:
+            missing.setdefault(key, []).append(i)
+    logger.info(f"Embedding cache: {len(chunks) - sum(map(len, missing.values()))} hits, {len(missing)} distinct misses.")
+
+    if missing:
+        first_indexes = [indexes[0] for indexes in missing.values()]
+        new_embeddings = _embed_uncached([chunks[i] for i in first_indexes], model, task_type)
+        if not new_embeddings:
+            return []
+        cache.put_many(list(missing), new_embeddings)
+        for indexes, embedding in zip(missing.values(), new_embeddings):
+            for i in indexes:
+                embeddings[i] = embedding
+
+    return [embeddings[i] for i in range(len(chunks))]
+
+
+def _embed_uncached(chunks: List[str], model: str, task_type: str) -> List[List[float]]:
+    """
+    Embeds chunks with the configured backend.
+
+    Chunks are split into batches bounded by `EMBEDDING_BATCH_SIZE` items and
+    `EMBEDDING_BATCH_TOKENS` estimated tokens, which are embedded concurrently
+    by up to `EMBEDDING_CONCURRENCY` workers. Failed batches are retried on
+    their own, and the output order always matches the input order.
+    """
+    if project_config.EMBEDDING_URL:
+        logger.info(f'Using selfhosted embedding model with {project_config.EMBEDDING_URL}')
+
+    batches = make_batches(chunks, project_config.EMBEDDING_BATCH_SIZE, project_config.EMBEDDING_BATCH_TOKENS)
+    workers = max(1, min(project_config.EMBEDDING_CONCURRENCY, len(batches)))
+    logger.info(f"Embedding {len(chunks)} chunks in {len(batches)} batches with {workers} workers.")
+
+    embeddings = [None] * len(chunks)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as executor:
+            futures = {
+                executor.submit(
+                    _embed_batch_with_retry, chunks[start:end], model, task_type, project_config.EMBEDDING_MAX_RETRIES
+                ): (start, end)
+                for start, end in batches
+            }
+            for future in as_completed(futures):
+                start, end = futures[future]
+                embeddings[start:end] = future.result()
+    except Exception as e:
+        logger.error(f"Error generating embeddings: {e}")
+        return []
+
+    return embeddings
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings with in-flight request coalescing.
+
+    When several threads ask for the same missing key at once, only the
+    first one computes it; the others wait for its result.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._in_flight: dict = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute: Callable[[], List[float]]) -> List[float]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            # Failed embeddings come back empty; don't pin them in the cache.
+            if value:
+                self._entries[key] = value
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+query_cache = QueryEmbeddingCache(project_config.QUERY_CACHE_SIZE)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+def embed_query(
+    query: str,
+    model: str = "models/gemini-embedding-001",
+    task_type: str = "retrieval_document",
+) -> List[float]:
+    """
+    Embeds a search query through the query embedding cache.
+
+    Queries that differ only in case or whitespace share one entry, and
+    concurrent identical queries share one embedding call. Only the cache key
+    is normalized; the entry holds the embedding of the first spelling seen.
+
+    Returns:
+        The query embedding, or an empty list if embedding failed.
+    """
+    backend = f"{project_config.EMBEDDING_URL}|{project_config.SELFHOSTED_EMBEDDING_MODEL}" if project_config.EMBEDDING_URL else model
+    normalized = normalize_query(query)
+    key = (normalized, backend, task_type, project_config.EMBEDDING_DIM)
+
+    def compute():
+        embeddings = generate_embeddings([query], model=model, task_type=task_type)
+        return embeddings[0] if embeddings else []
+
+    return query_cache.get_or_compute(key, compute)
+
+
+def query_cache_stats() -> dict:
+    """Hit, miss and coalescing counters of the query embedding cache."""
+    return query_cache.stats()
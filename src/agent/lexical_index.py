@@ -0,0 +1,158 @@
+import math
+import re
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import logger
+
+# Keeps identifiers such as "A-113", "4.2.1" or "parse_args" as single tokens.
+_TOKEN = re.compile(r"\w+(?:[.\-/:]\w+)*")
+_SUBTOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased word tokens. Compound identifiers are emitted whole and also
+    split into their parts, so "A-113" matches queries for "A-113" and "113".
+    """
+    tokens = []
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        parts = _SUBTOKEN.findall(token)
+        if len(parts) > 1 or (parts and parts[0] != token):
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over chunk texts.
+
+    Documents are added incrementally into per-term arrays, then `finalize`
+    packs the postings into flat arrays indexed by term offsets: a term
+    dictionary plus `uint32` document numbers and `uint16` term frequencies.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms: Dict[str, int] = {}
+        self.point_ids: List[Any] = []
+        self.doc_lengths = array("I")
+        self._building_docs: List[array] = []
+        self._building_tfs: List[array] = []
+        self.offsets = None
+        self.postings_docs = None
+        self.postings_tfs = None
+
+    def __len__(self):
+        return len(self.point_ids)
+
+    def add(self, point_id, text: str):
+        if self.offsets is not None:
+            raise RuntimeError("Cannot add documents to a finalized BM25 index.")
+        doc = len(self.point_ids)
+        self.point_ids.append(point_id)
+        tokens = tokenize(text)
+        self.doc_lengths.append(len(tokens))
+
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            term = self.terms.get(token)
+            if term is None:
+                term = self.terms[token] = len(self._building_docs)
+                self._building_docs.append(array("I"))
+                self._building_tfs.append(array("H"))
+            self._building_docs[term].append(doc)
+            self._building_tfs[term].append(min(count, 65535))
+
+    def finalize(self) -> "BM25Index":
+        lengths = np.fromiter((len(docs) for docs in self._building_docs), dtype=np.int64, count=len(self._building_docs))
+        self.offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.postings_docs = np.empty(self.offsets[-1], dtype=np.uint32)
+        self.postings_tfs = np.empty(self.offsets[-1], dtype=np.uint16)
+        for term, (docs, tfs) in enumerate(zip(self._building_docs, self._building_tfs)):
+            start, end = self.offsets[term], self.offsets[term + 1]
+            self.postings_docs[start:end] = np.frombuffer(docs, dtype=np.uint32)
+            self.postings_tfs[start:end] = np.frombuffer(tfs, dtype=np.uint16)
+        self._building_docs, self._building_tfs = [], []
+        self.doc_lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32).copy()
+        logger.info(f"BM25 index finalized: {len(self.point_ids)} documents, {len(self.terms)} terms, {len(self.postings_docs)} postings.")
+        return self
+
+    def search(self, query: str, limit: int) -> List[Tuple[Any, float]]:
+        """
+        Returns up to `limit` `(point_id, score)` pairs, best first. Only
+        documents containing at least one query term are returned.
+        """
+        if self.offsets is None:
+            raise RuntimeError("BM25 index must be finalized before searching.")
+        n_docs = len(self.point_ids)
+        if n_docs == 0 or limit <= 0:
+            return []
+
+        average_length = float(self.doc_lengths.mean()) or 1.0
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / average_length)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        matched = False
+        for token in set(tokenize(query)):
+            term = self.terms.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            docs = self.postings_docs[start:end]
+            tfs = self.postings_tfs[start:end].astype(np.float32)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            # Each document appears at most once per term, so plain fancy-index add is safe.
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + length_norm[docs])
+            matched = True
+
+        if not matched:
+            return []
+        candidates = np.flatnonzero(scores)
+        k = min(limit, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]] if k < len(candidates) else candidates
+        top = top[np.argsort(-scores[top])]
+        return [(self.point_ids[doc], float(scores[doc])) for doc in top]
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the packed arrays (term dictionary excluded)."""
+        if self.offsets is None:
+            return 0
+        return self.offsets.nbytes + self.postings_docs.nbytes + self.postings_tfs.nbytes + self.doc_lengths.nbytes
+
+
+def reciprocal_rank_fusion(*rankings: List[Any], k: int = 60) -> List[Any]:
+    """
+    Merges ranked lists of ids with reciprocal rank fusion, best first.
+    """
+    scores: Dict[Any, float] = {}
+    for ranking in rankings:
+        for rank, point_id in enumerate(ranking):
+            scores[point_id] = scores.get(point_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+_indexes: Dict[str, BM25Index] = {}
+_indexes_lock = threading.Lock()
+
+
+def set_lexical_index(collection_name: str, index: BM25Index):
+    with _indexes_lock:
+        _indexes[collection_name] = index
+
+
+def get_lexical_index(collection_name: str) -> Optional[BM25Index]:
+    return _indexes.get(collection_name)
+
+
+def drop_lexical_index(collection_name: str):
+    with _indexes_lock:
+        _indexes.pop(collection_name, None)
@@ -0,0 +1,330 @@
+import os
+import tempfile
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src import config as project_config
+from src.agent.vector_store import Record, ScoredPoint, VectorStore
+
+QUANTIZATIONS = ("none", "int8", "binary")
+
+# Rows scored per step when scanning quantized codes, bounds the float32 scratch memory.
+_SCAN_BLOCK = 65536
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def int8_scale(vectors: np.ndarray) -> np.ndarray:
+    """Per-dimension max-abs of `vectors`, the value each dimension's int8 code 127 stands for."""
+    scale = np.abs(vectors).max(axis=0) if len(vectors) else np.zeros(vectors.shape[1], dtype=np.float32)
+    return scale.astype(np.float32)
+
+
+def quantize(vectors: np.ndarray, quantization: str, scale: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Encodes normalized vectors for the in-RAM search index.
+
+    `int8` maps each component from [-scale, scale] to [-127, 127], with
+    `scale` the per-dimension max-abs (`int8_scale(vectors)` by default), so
+    embedding components that stay well inside [-1, 1] still use the whole
+    code range; `binary` keeps one sign bit per component, packed eight to a byte.
+    """
+    if quantization == "int8":
+        scale = int8_scale(vectors) if scale is None else scale
+        step = np.where(scale > 0, scale, 1.0).astype(np.float32) / 127
+        return np.clip(np.rint(vectors / step), -127, 127).astype(np.int8)
+    if quantization == "binary":
+        return np.packbits(vectors > 0, axis=1)
+    raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}.")
+
+
+class _DiskMatrix:
+    """
+    Growable float32 matrix in a memory-mapped temporary file.
+
+    Holds the exact vectors used for rescoring when the search index is
+    quantized, so they live in the page cache instead of the process heap.
+    """
+
+    def __init__(self, columns: int, directory: Optional[str] = None):
+        self.columns = columns
+        fd, self.path = tempfile.mkstemp(prefix="vectors-", suffix=".f32", dir=directory)
+        os.close(fd)
+        self.array = np.empty((0, columns), dtype=np.float32)
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+
+    def __len__(self):
+        return len(self.array)
+
+    def resize(self, rows: int):
+        self.array = None
+        with open(self.path, "r+b") as f:
+            f.truncate(rows * self.columns * 4)
+        self.array = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(rows, self.columns))
+
+    def close(self):
+        self.array = None
+        self._finalizer()
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class _Collection:
+    """
+    Normalized float32 vectors in one contiguous, over-allocated array,
+    plus ids and payloads in the same row order.
+
+    With quantization enabled, only the quantized codes are kept in RAM and
+    searched; the float32 vectors move to a `_DiskMatrix` and are read back
+    only to rescore the best candidates exactly. `int8` codes share one
+    per-dimension `scale`. Components beyond it are clipped until the
+    collection has doubled since the last re-encode; then the scale is
+    widened to the max-abs seen so far and the stored codes are re-encoded
+    from the float32 vectors, so re-encoding stays amortised O(1) per row.
+    """
+
+    def __init__(self, vector_size: int, quantization: str = "none", oversampling: float = 4.0, storage_dir: Optional[str] = None):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}.")
+        self.vector_size = vector_size
+        self.quantization = quantization
+        self.oversampling = oversampling
+        self.size = 0
+        self.ids: List[Any] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self.rows: Dict[Any, int] = {}
+        self.scale = np.zeros(vector_size, dtype=np.float32)
+        # Max-abs of every vector stored so far, applied to `scale` at the next re-encode.
+        self._max_abs = np.zeros(vector_size, dtype=np.float32)
+        self._encoded_size = 0
+        self.requantizations = 0
+
+        if quantization == "none":
+            self._disk = None
+            self.vectors = np.empty((0, vector_size), dtype=np.float32)
+            self.codes = None
+        else:
+            self._disk = _DiskMatrix(vector_size, storage_dir)
+            self.vectors = self._disk.array
+            code_size = vector_size if quantization == "int8" else (vector_size + 7) // 8
+            self.codes = np.empty((0, code_size), dtype=np.int8 if quantization == "int8" else np.uint8)
+
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        if needed <= len(self.vectors):
+            return
+        capacity = max(needed, 2 * len(self.vectors), 1024)
+        if self._disk is not None:
+            self._disk.resize(capacity)
+            self.vectors = self._disk.array
+            grown = np.empty((capacity, self.codes.shape[1]), dtype=self.codes.dtype)
+            grown[:self.size] = self.codes[:self.size]
+            self.codes = grown
+        else:
+            grown = np.empty((capacity, self.vector_size), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+
+    def upsert(self, ids, vectors, payloads):
+        vectors = normalize_rows(vectors)
+        if vectors.shape[1] != self.vector_size:
+            raise ValueError(f"Expected vectors of size {self.vector_size}, got {vectors.shape[1]}.")
+
+        self._reserve(len(ids))
+        if self.quantization == "int8":
+            self._max_abs = np.maximum(self._max_abs, int8_scale(vectors))
+            if np.any(self._max_abs > self.scale) and self.size >= 2 * self._encoded_size:
+                self.scale = self._max_abs.copy()
+                self._requantize()
+        codes = quantize(vectors, self.quantization, self.scale) if self.codes is not None else None
+        for i, (point_id, payload) in enumerate(zip(ids, payloads)):
+            row = self.rows.get(point_id)
+            if row is None:
+                row = self.rows[point_id] = self.size
+                self.size += 1
+                self.ids.append(point_id)
+                self.payloads.append(payload)
+            else:
+                self.payloads[row] = payload
+            self.vectors[row] = vectors[i]
+            if codes is not None:
+                self.codes[row] = codes[i]
+
+    def _requantize(self):
+        """Re-encodes the stored int8 codes with the current `scale`."""
+        for start in range(0, self.size, _SCAN_BLOCK):
+            end = min(start + _SCAN_BLOCK, self.size)
+            self.codes[start:end] = quantize(self.vectors[start:end], "int8", self.scale)
+        if self.size:
+            self.requantizations += 1
+        self._encoded_size = self.size
+
+    def delete(self, ids):
+        """Removes rows by moving the last row into each freed slot."""
+        for point_id in ids:
+            row = self.rows.pop(point_id, None)
+            if row is None:
+                continue
+            last = self.size - 1
+            if row != last:
+                moved_id = self.ids[last]
+                self.ids[row] = moved_id
+                self.payloads[row] = self.payloads[last]
+                self.vectors[row] = self.vectors[last]
+                if self.codes is not None:
+                    self.codes[row] = self.codes[last]
+                self.rows[moved_id] = row
+            self.ids.pop()
+            self.payloads.pop()
+            self.size = last
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Scores every row against the query using only the quantized codes."""
+        scores = np.empty(self.size, dtype=np.float32)
+        if self.quantization == "int8":
+            # Dequantize through the query: code * scale / 127 approximates each stored component.
+            query_weights = query * self.scale / 127
+            for start in range(0, self.size, _SCAN_BLOCK):
+                end = min(start + _SCAN_BLOCK, self.size)
+                scores[start:end] = self.codes[start:end].astype(np.float32) @ query_weights
+        else:
+            query_codes = quantize(query[None, :], "binary")[0]
+            for start in range(0, self.size, _SCAN_BLOCK):
+                end = min(start + _SCAN_BLOCK, self.size)
+                distances = _POPCOUNT[np.bitwise_xor(self.codes[start:end], query_codes)].sum(axis=1, dtype=np.int32)
+                scores[start:end] = -distances
+        return scores
+
+    def search(self, query_vector, limit: int) -> List[ScoredPoint]:
+        if self.size == 0 or limit <= 0:
+            return []
+        query = normalize_rows(query_vector)[0]
+
+        if self.codes is None:
+            scores = self.vectors[:self.size] @ query
+            candidates = np.arange(self.size)
+        else:
+            # Shortlist with the quantized index, then rescore the shortlist with exact vectors.
+            approximate = self._approximate_scores(query)
+            shortlist = min(self.size, max(limit, int(limit * self.oversampling)))
+            candidates = np.argpartition(-approximate, shortlist - 1)[:shortlist] if shortlist < self.size else np.arange(self.size)
+            candidates.sort()
+            scores = np.full(self.size, -np.inf, dtype=np.float32)
+            scores[candidates] = self.vectors[candidates] @ query
+
+        k = min(limit, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]] if k < len(candidates) else candidates
+        top = top[np.argsort(-scores[top])]
+        return [ScoredPoint(id=self.ids[row], score=float(scores[row]), payload=self.payloads[row]) for row in top]
+
+    def memory_usage(self) -> int:
+        """Bytes of vector data held in RAM (disk-backed rescoring vectors excluded)."""
+        if self.codes is not None:
+            return self.codes.nbytes
+        return self.vectors.nbytes
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process `VectorStore` that answers top-k queries with a single
+    matrix-vector product and `np.argpartition`.
+
+    Args:
+        quantization: `none`, `int8` or `binary`. Defaults to `VECTOR_QUANTIZATION`.
+        oversampling: How many times `limit` candidates the quantized index
+            shortlists for exact rescoring. Defaults to `RESCORE_OVERSAMPLING`.
+        storage_dir: Where disk-backed rescoring vectors are kept. Defaults to
+            the system temporary directory.
+    """
+
+    def __init__(self, quantization: Optional[str] = None, oversampling: Optional[float] = None, storage_dir: Optional[str] = None):
+        self.quantization = quantization or project_config.VECTOR_QUANTIZATION
+        self.oversampling = oversampling or project_config.RESCORE_OVERSAMPLING
+        self.storage_dir = storage_dir
+        self._collections: Dict[str, _Collection] = {}
+        self._lock = threading.RLock()
+
+    def _get(self, collection_name: str) -> _Collection:
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            raise KeyError(f"Collection '{collection_name}' not found.")
+        return collection
+
+    def create_collection(self, collection_name, vector_size, recreate=True):
+        with self._lock:
+            if collection_name in self._collections and not recreate:
+                raise ValueError(f"Collection '{collection_name}' already exists.")
+            old = self._collections.get(collection_name)
+            if old is not None:
+                old.close()
+            self._collections[collection_name] = _Collection(vector_size, self.quantization, self.oversampling, self.storage_dir)
+            return True
+
+    def collection_exists(self, collection_name):
+        return collection_name in self._collections
+
+    def delete_collection(self, collection_name):
+        with self._lock:
+            collection = self._collections.pop(collection_name, None)
+            if collection is None:
+                return False
+            collection.close()
+            return True
+
+    def get_vector_size(self, collection_name):
+        return self._get(collection_name).vector_size
+
+    def upsert(self, collection_name, ids, vectors, payloads):
+        with self._lock:
+            self._get(collection_name).upsert(list(ids), vectors, payloads)
+
+    def delete(self, collection_name, ids):
+        with self._lock:
+            self._get(collection_name).delete(ids)
+
+    def search(self, collection_name, query_vector, limit):
+        with self._lock:
+            return self._get(collection_name).search(query_vector, limit)
+
+    def retrieve(self, collection_name, ids):
+        with self._lock:
+            collection = self._get(collection_name)
+            rows = [collection.rows[point_id] for point_id in ids if point_id in collection.rows]
+            return [Record(id=collection.ids[row], payload=collection.payloads[row]) for row in rows]
+
+    def scroll(self, collection_name, limit, offset=None, with_vectors=True):
+        with self._lock:
+            collection = self._get(collection_name)
+            start = offset or 0
+            end = min(start + limit, collection.size)
+            records = [
+                Record(
+                    id=collection.ids[row],
+                    payload=collection.payloads[row],
+                    vector=collection.vectors[row].tolist() if with_vectors else None,
+                )
+                for row in range(start, end)
+            ]
+            return records, (end if end < collection.size else None)
+
+    def memory_usage(self) -> int:
+        """Approximate bytes of vector data held in RAM across all collections."""
+        return sum(collection.memory_usage() for collection in self._collections.values())
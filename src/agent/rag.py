@@ -1,20 +1,33 @@
+import hashlib
 import json
-from typing import List, Dict, Any
-import google.generativeai as genai
+import os
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from qdrant_client import QdrantClient
-import fitz
-import requests
-import streamlit as st
 
-from src.pdf_tools.pdf_extractor import extract_text_from_pdf, chunk_text
+from src.pdf_tools.document_pool import document_pool
+from src.pdf_tools.pdf_extractor import iter_pages, iter_page_chunks
 from src import config as project_config
 from src.config import logger
 
+from .embeddings import embed_query, generate_embeddings, query_cache_stats
+from .lexical_index import BM25Index, drop_lexical_index, get_lexical_index, reciprocal_rank_fusion, set_lexical_index
+from .session_registry import SessionEntry, session_registry
 from .vector_db import (
+    BatchUpserter,
+    collection_vector_size,
     create_collection,
+    delete_vectors,
+    export_collection,
+    import_collection,
+    iter_collection_data,
     upsert_vectors,
+    retrieve_points,
     search_vectors,
 )
+from .vector_store import as_vector_store
+
+POINT_ID_NAMESPACE = uuid.UUID("6f1d2a52-3c1e-4b8e-9a57-0d4f1c2b7e93")
 
 
 def save_vectors(
@@ -22,7 +35,7 @@ def save_vectors(
     collection_name: str,
     chunks: List[str],
     payloads: List[Dict[str, Any]],
-    vector_size: int = 768,
+    vector_size: Optional[int] = None,
 ):
     """
     Generates embeddings for text chunks and saves them to a Qdrant collection.
@@ -31,18 +44,18 @@ def save_vectors(
         collection_name: The name of the collection to save vectors to.
         chunks: A list of text chunks to be vectorized.
         payloads: A list of metadata for each chunk.
-        vector_size: The dimensionality of the vectors.
+        vector_size: The dimensionality of the vectors. Defaults to the size
+            of the generated embeddings.
 
     Returns:
         The Qdrant client instance used for the operation.
     """
     logger.debug(f"Saving vectors to collection: {collection_name}")
     try:
-        create_collection(qdrant_client, collection_name, vector_size)
-        
         embeddings = generate_embeddings(chunks)
         
         if embeddings:
+            create_collection(qdrant_client, collection_name, vector_size or len(embeddings[0]))
             upsert_vectors(qdrant_client, collection_name, embeddings, payloads)
             logger.info(f"Successfully upserted {len(embeddings)} vectors to collection {collection_name}.")
         else:
@@ -53,39 +66,71 @@ def save_vectors(
     
 
 
-def search_pdf(query: str) -> List[Dict[str, Any]]:
+def search_pdf(query: str, mode: str = "hybrid", limit: int = 5) -> List[Dict[str, Any]]:
     """
-    Searches the Qdrant collection for a given query.
+    Searches the PDF for a given query.
+
+    Combines keyword (BM25) and semantic search with reciprocal rank fusion.
+    Use `mode="lexical"` for exact terms such as part numbers, clause IDs or
+    function names; it is faster because it skips the embedding call.
 
     Args:
         query: The search query string.
+        mode: `hybrid` (default), `lexical` (keywords only) or `dense` (semantic only).
+        limit: The maximum number of results to return.
 
     Returns:
         A list of search result payloads.
     """
-    logger.info(f"Searching PDF with query: '{query}'")
-    
+    logger.info(f"Searching PDF with query: '{query}' (mode: {mode})")
+    collection_name = project_config.session_id
+
     try:
+        # Reloads the index if it was evicted to disk while the session was idle.
+        session_registry.touch(collection_name)
+
+        lexical_index = get_lexical_index(collection_name)
+        lexical_ids = []
+        if mode != "dense" and lexical_index is not None:
+            lexical_ids = [point_id for point_id, _ in lexical_index.search(query, max(limit * 4, 20))]
+            logger.info(f"Found {len(lexical_ids)} lexical results for query: '{query}'")
+
+        if mode == "lexical" and lexical_ids:
+            records = retrieve_points(project_config.qdrant_client, collection_name, lexical_ids[:limit])
+            return [record.payload for record in records]
+
         if project_config.DEBUG:
             with open('data/query_embedding.json', 'r') as f:
                 query_embedding = json.loads(f.read())['embedding']
         else:
-            query_embedding = generate_embeddings([query])
+            query_embedding = [embed_query(query)]
+            logger.debug(f"Query embedding cache stats: {query_cache_stats()}")
         
-        if not query_embedding:
+        if not query_embedding or not query_embedding[0]:
             logger.warning("Query embedding is empty, cannot perform search.")
             return []
 
         search_results = search_vectors(
             project_config.qdrant_client,
-            project_config.session_id,
+            collection_name,
             query_embedding[0],
-            5,
+            max(limit * 4, 20) if lexical_ids else limit,
         )
 
         logger.info(f"Found {len(search_results)} embedding results for query: '{query}'")
-        
-        return [result.payload for result in search_results]
+
+        if not lexical_ids:
+            return [result.payload for result in search_results[:limit]]
+
+        payloads = {result.id: result.payload for result in search_results}
+        fused_ids = reciprocal_rank_fusion([result.id for result in search_results], lexical_ids)[:limit]
+        missing = [point_id for point_id in fused_ids if point_id not in payloads]
+        if missing:
+            payloads.update(
+                (record.id, record.payload)
+                for record in retrieve_points(project_config.qdrant_client, collection_name, missing)
+            )
+        return [payloads[point_id] for point_id in fused_ids if point_id in payloads]
     except Exception as e:
         logger.error(f"Error during PDF search for query '{query}': {e}")
         return []
@@ -93,58 +138,158 @@ def search_pdf(query: str) -> List[Dict[str, Any]]:
 
 
 
-def generate_embeddings(chunks: List[str], model: str = "models/gemini-embedding-001") -> List[List[float]]:
+def iter_chunk_batches(
+    pdf_path: str,
+    batch_size: int,
+    length_function: Optional[Callable[[str], int]] = None,
+) -> Iterator[Tuple[List[str], List[Dict[str, Any]]]]:
     """
-    Generates embeddings for a list of text chunks.
+    Streams a PDF as batches of text chunks and their payloads.
+
+    Pages are extracted lazily, so at most one page and one batch of chunks
+    are held in memory at a time. Payloads record the pages each chunk spans;
+    `page_num` is the page the chunk starts on.
 
     Args:
-        chunks: A list of text chunks to embed.
-        model: The name of the embedding model to use.
+        pdf_path: The path to the PDF file.
+        batch_size: The maximum number of chunks per batch.
+        length_function: Optional tokenizer-based length function for the chunker.
+
+    Yields:
+        `(chunks, payloads)` tuples of at most `batch_size` items.
+    """
+    chunks, payloads = [], []
+    for chunk in iter_page_chunks(iter_pages(pdf_path), length_function=length_function):
+        chunks.append(chunk["text"])
+        payloads.append({
+            "text": chunk["text"],
+            "page_num": chunk["start_page"],
+            "start_page": chunk["start_page"],
+            "end_page": chunk["end_page"],
+        })
+        if len(chunks) >= batch_size:
+            yield chunks, payloads
+            chunks, payloads = [], []
+    if chunks:
+        yield chunks, payloads
+
+
+def make_point_id(document_id: str, start_page: int, end_page: int, text: str) -> str:
+    """
+    Deterministic point ID derived from the document, the page span and the chunk content.
+    """
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{document_id}:{start_page}-{end_page}:{content_hash}"))
+
+
+class _VectorSizeChanged(Exception):
+    """The stored collection was built with a different embedding size and must be rebuilt."""
+
+
+def estimate_index_memory(num_chunks: int, vector_size: int, text_bytes: int, lexical_index: BM25Index) -> int:
+    """
+    Rough resident size of a session index: vectors, payloads and the BM25 index.
+    """
+    bytes_per_component = {"int8": 1, "binary": 1 / 8}.get(project_config.VECTOR_QUANTIZATION, 4)
+    vectors = num_chunks * vector_size * bytes_per_component
+    # Python str/dict overhead roughly doubles the raw text and adds a few hundred bytes per payload.
+    payloads = 2 * text_bytes + 300 * num_chunks
+    lexical = lexical_index.memory_usage() + 100 * len(lexical_index.terms)
+    return int(vectors + payloads + lexical)
+
+
+def _ingest(qdrant_client, collection_name: str, document_id: str, batches, embed) -> Optional[Tuple[int, int]]:
+    """
+    Diffs the document's chunks against the collection, embeds and upserts
+    only new chunks, deletes stale ones and rebuilds the lexical index.
 
     Returns:
-        A list of embeddings, where each embedding is a list of floats.
+        `(number of chunks in the document, estimated index memory in bytes)`,
+        or None if embedding failed.
     """
-    if not chunks:
-        return []
+    vector_size = collection_vector_size(qdrant_client, collection_name)
+    existing_ids = set()
+    if vector_size is not None:
+        existing_ids = {record.id for record in iter_collection_data(qdrant_client, collection_name, with_vectors=False)}
+        logger.info(f"Collection '{collection_name}' already holds {len(existing_ids)} chunks.")
 
-    for _ in range(10):
-        try:
-            logger.info(f'Using selfhosted embedding model with {project_config.EMBEDDING_URL}')
-            # for self hosted embedding model
-            if project_config.EMBEDDING_URL:
-                payload = {
-                    "input": text,
-                    "model": "gemmaembedding-300m"
-                }
-                response = requests.post(project_config.EMBEDDING_URL,json=payload)
-                response.raise_for_status()
-                return response.json()['data'][0]['embedding']
-            else:
-                result = genai.embed_content(
-                    model=model,
-                    content=chunks,
-                    task_type="retrieval_document"
-                )
-                return result['embedding']
-        except Exception as e:
-            logger.error(f"Error generating embeddings: {e}")
-        
-    return []
+    lexical_index = BM25Index()
+    seen_ids = set()
+    new_count = 0
+    text_bytes = 0
+    with BatchUpserter(qdrant_client, collection_name, project_config.UPSERT_BATCH_SIZE, project_config.UPSERT_CONCURRENCY) as upserter:
+        for chunks, payloads in batches:
+            new_ids, new_chunks, new_payloads = [], [], []
+            for chunk, payload in zip(chunks, payloads):
+                point_id = make_point_id(document_id, payload["start_page"], payload["end_page"], chunk)
+                if point_id in seen_ids:
+                    continue
+                seen_ids.add(point_id)
+                text_bytes += len(chunk)
+                lexical_index.add(point_id, chunk)
+                if point_id not in existing_ids:
+                    new_ids.append(point_id)
+                    new_chunks.append(chunk)
+                    new_payloads.append({**payload, "document_id": document_id})
+
+            if not new_ids:
+                continue
+
+            embeddings = embed(new_chunks)
+            if not embeddings:
+                logger.error("Failed to generate embeddings for chunks.")
+                return None
+
+            if vector_size is None:
+                vector_size = len(embeddings[0])
+                logger.info(f"Creating Qdrant collection '{collection_name}' with vector size {vector_size}.")
+                create_collection(qdrant_client, collection_name, vector_size, recreate=True)
+            elif vector_size != len(embeddings[0]):
+                raise _VectorSizeChanged()
+
+            upserter.add(new_ids, embeddings, new_payloads)
+            new_count += len(new_ids)
+            logger.info(f"Queued {new_count} new chunks for collection '{collection_name}' ({len(seen_ids)} chunks read).")
+
+    stale_ids = list(existing_ids - seen_ids)
+    for start in range(0, len(stale_ids), project_config.UPSERT_BATCH_SIZE):
+        delete_vectors(qdrant_client, collection_name, stale_ids[start:start + project_config.UPSERT_BATCH_SIZE])
 
+    logger.info(
+        f"Collection '{collection_name}': {new_count} chunks embedded, "
+        f"{len(seen_ids) - new_count} reused, {len(stale_ids)} stale chunks deleted."
+    )
+    if not seen_ids:
+        return 0, 0
+    set_lexical_index(collection_name, lexical_index.finalize())
+    return len(seen_ids), estimate_index_memory(len(seen_ids), vector_size or 0, text_bytes, lexical_index)
 
-def setup_rag_pipeline(qdrant_client, pdf_path: str, collection_name: str):
+
+def setup_rag_pipeline(qdrant_client, pdf_path: str, collection_name: str, document_id: Optional[str] = None):
     """
     Sets up the RAG pipeline by processing the PDF, generating embeddings,
-    and storing them in a Qdrant collection.
+    and storing them in a Qdrant collection. A BM25 index over the same
+    chunks is built alongside for lexical and hybrid search.
+
+    The PDF is processed as a stream: each batch of chunks is embedded and
+    upserted before the next pages are extracted, so memory stays bounded by
+    `INGEST_BATCH_SIZE` regardless of the document length.
+
+    Ingestion is incremental. Point IDs are derived from the document ID, the
+    page span and the chunk content, so re-ingesting a revised document only
+    embeds new chunks and deletes the ones that disappeared.
 
     Args:
         pdf_path: The path to the PDF file.
         collection_name: The name of the collection to create in Qdrant.
+        document_id: A stable ID for the document across revisions.
+            Defaults to the file name.
 
     Returns:
         The Qdrant client.
     """
     logger.info(f"Setting up RAG pipeline for PDF: {pdf_path}, collection: {collection_name}")
+    document_id = document_id or os.path.basename(pdf_path)
 
     try:
         if project_config.DEBUG:
@@ -153,49 +298,76 @@ def setup_rag_pipeline(qdrant_client, pdf_path: str, collection_name: str):
                 embeddings = json.loads(f.read())
             with open('data/chunks.json', 'r') as f:
                 chunks = json.loads(f.read())
+            payloads = [{"text": chunk, "page_num": i+1, "start_page": i+1, "end_page": i+1} for i, chunk in enumerate(chunks)]
+            debug_vectors = dict(zip(chunks, embeddings))
+            make_batches = lambda: [(chunks, payloads)]
+            embed = lambda texts: [debug_vectors[text] for text in texts]
         else:
-            # Extract text from the PDF
-            text = extract_text_from_pdf(pdf_path)
-            if not text:
-                logger.warning(f"No text extracted from PDF: {pdf_path}")
-                return None
+            make_batches = lambda: iter_chunk_batches(pdf_path, project_config.INGEST_BATCH_SIZE)
+            embed = generate_embeddings
 
-            # Chunk the text
-            chunks = chunk_text(text)
-            logger.info(f"Extracted {len(chunks)} chunks from PDF.")
+        try:
+            result = _ingest(qdrant_client, collection_name, document_id, make_batches(), embed)
+        except _VectorSizeChanged:
+            logger.warning(f"Embedding size changed, rebuilding collection '{collection_name}' from scratch.")
+            as_vector_store(qdrant_client).delete_collection(collection_name)
+            result = _ingest(qdrant_client, collection_name, document_id, make_batches(), embed)
 
-            # Generate embeddings for the chunks
-            logger.info('Generating embeddings for chunks...')
-            embeddings = generate_embeddings(chunks)
-            if not embeddings:
-                logger.error("Failed to generate embeddings for chunks.")
-                return None
+        if result is None:
+            return None
+        total_chunks, memory_bytes = result
+        if total_chunks == 0:
+            logger.warning(f"No text extracted from PDF: {pdf_path}")
+            return None
 
-        # Set up the vector database
-        if embeddings:
-            vector_size = len(embeddings[0])
-            logger.info(f"Creating/recreating Qdrant collection '{collection_name}' with vector size {vector_size}. Recreate: {project_config.RECREATE_COLLECTION}")
-            create_collection(qdrant_client, collection_name, vector_size, project_config.RECREATE_COLLECTION)
-            payloads = [{"text": chunk, "page_num": i+1} for i, chunk in enumerate(chunks)] # Added page_num to payload
-            logger.info(f"Upserting {len(embeddings)} vectors into collection '{collection_name}'.")
-            upsert_vectors(qdrant_client, collection_name, embeddings, payloads)
-            logger.info(f"RAG pipeline setup complete for collection: {collection_name}")
-        else:
-            logger.warning("No embeddings generated, skipping collection creation and upsert.")
+        session_registry.update_memory(collection_name, memory_bytes)
 
+        logger.info(f"RAG pipeline setup complete for collection: {collection_name} ({total_chunks} chunks).")
         return qdrant_client
     except Exception as e:
         logger.error(f"Error setting up RAG pipeline for {pdf_path}: {e}")
         return None
 
 
-@st.cache_data
+def _spill_session_index(entry: SessionEntry):
+    """Evicts a session's vector collection and BM25 index, exporting the collection first if spilling."""
+    client = project_config.qdrant_client
+    if client is None or not as_vector_store(client).collection_exists(entry.session_id):
+        entry.spill_path = None
+        return
+    if entry.spill_path:
+        export_collection(client, entry.session_id, entry.spill_path)
+    as_vector_store(client).delete_collection(entry.session_id)
+    drop_lexical_index(entry.session_id)
+
+
+def _restore_session_index(entry: SessionEntry):
+    """Re-imports a spilled collection and rebuilds its BM25 index, without re-embedding."""
+    client = project_config.qdrant_client
+    if client is None or not os.path.isdir(entry.spill_path):
+        return
+    import_collection(client, entry.session_id, entry.spill_path)
+    lexical_index = BM25Index()
+    num_chunks = text_bytes = 0
+    for record in iter_collection_data(client, entry.session_id, with_vectors=False):
+        text = record.payload.get("text", "")
+        lexical_index.add(record.id, text)
+        num_chunks += 1
+        text_bytes += len(text)
+    set_lexical_index(entry.session_id, lexical_index.finalize())
+    vector_size = collection_vector_size(client, entry.session_id) or 0
+    entry.memory_bytes = estimate_index_memory(num_chunks, vector_size, text_bytes, lexical_index)
+
+
+session_registry.on_evict(_spill_session_index)
+session_registry.on_restore(_restore_session_index)
+
+
 def get_pdf_page(page_num: int):
     logger.debug(f"Getting page {page_num} from PDF: {project_config.UPLOAD_PDF}")
     try:
-        pdf = fitz.open(project_config.UPLOAD_PDF)
-        page = pdf.load_page(page_num)
-        return str(page.get_text())
+        with document_pool.open(project_config.UPLOAD_PDF) as document:
+            return str(document.get_page_text(page_num))
     except Exception as e:
         logger.error(f"Error getting page {page_num} from PDF: {e}")
         return ""
\ No newline at end of file
@@ -0,0 +1,217 @@
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from src import config as project_config
+from src.config import logger
+
+
+@dataclass
+class SessionEntry:
+    session_id: str
+    user_id: Optional[str] = None
+    last_access: float = 0.0
+    memory_bytes: int = 0
+    # Set while the session's index is evicted to disk.
+    spill_path: Optional[str] = None
+    # Held while the session is being evicted or restored. Callbacks run under
+    # it instead of the registry lock, so other sessions are not blocked by their I/O.
+    transition_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class SessionRegistry:
+    """
+    Tracks last access and approximate memory of each session, and evicts
+    idle sessions by TTL and least-recently-used sessions once the global
+    memory budget is exceeded.
+
+    The registry only does the bookkeeping. Modules that hold per-session
+    state register `on_evict` callbacks to free it (and optionally spill it
+    to `entry.spill_path`), `on_restore` callbacks to load spilled state
+    back when the session is touched again, and `on_discard` callbacks for
+    state that must survive a spill and is only dropped once the session is
+    gone for good (evicted without a spill, or its spill expired).
+    """
+
+    def __init__(self, ttl_seconds: int, memory_budget_bytes: int, spill_dir: str = "", spill_ttl_seconds: int = 24 * 3600):
+        self.ttl_seconds = ttl_seconds
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_dir = spill_dir
+        self.spill_ttl_seconds = spill_ttl_seconds
+        self._entries: "OrderedDict[str, SessionEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._evict_callbacks: List[Callable[[SessionEntry], None]] = []
+        self._restore_callbacks: List[Callable[[SessionEntry], None]] = []
+        self._discard_callbacks: List[Callable[[SessionEntry], None]] = []
+        self._sweeper = None
+
+    def on_evict(self, callback: Callable[[SessionEntry], None]):
+        self._evict_callbacks.append(callback)
+
+    def on_restore(self, callback: Callable[[SessionEntry], None]):
+        self._restore_callbacks.append(callback)
+
+    def on_discard(self, callback: Callable[[SessionEntry], None]):
+        self._discard_callbacks.append(callback)
+
+    def _run_callbacks(self, callbacks: List[Callable[[SessionEntry], None]], entry: SessionEntry, action: str):
+        for callback in callbacks:
+            try:
+                callback(entry)
+            except Exception as e:
+                logger.error(f"Error {action} session {entry.session_id}: {e}")
+
+    def touch(self, session_id: str, user_id: Optional[str] = None) -> SessionEntry:
+        """
+        Marks a session as used now, restoring its spilled state if it was evicted.
+
+        If the session is being evicted, waits for that to finish and restores it.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                entry = self._entries[session_id] = SessionEntry(session_id=session_id)
+            self._entries.move_to_end(session_id)
+            entry.last_access = time.time()
+            if user_id is not None:
+                entry.user_id = user_id
+            if entry.spill_path is None:
+                return entry
+
+        with entry.transition_lock:
+            if entry.spill_path is None:
+                # Restored by another thread meanwhile.
+                return entry
+            logger.info(f"Restoring evicted session {session_id} from '{entry.spill_path}'.")
+            self._run_callbacks(self._restore_callbacks, entry, "restoring")
+            shutil.rmtree(entry.spill_path, ignore_errors=True)
+            with self._lock:
+                entry.spill_path = None
+        return entry
+
+    def is_spilled(self, session_id: str) -> bool:
+        entry = self._entries.get(session_id)
+        return entry is not None and entry.spill_path is not None
+
+    def update_memory(self, session_id: str, memory_bytes: int):
+        """Records the approximate resident size of a session and enforces the budget."""
+        entry = self.touch(session_id)
+        with self._lock:
+            entry.memory_bytes = memory_bytes
+        logger.info(f"Session {session_id} uses about {memory_bytes / 2**20:.1f} MB ({self.total_memory() / 2**20:.1f} MB in total).")
+        self.sweep()
+
+    def total_memory(self) -> int:
+        with self._lock:
+            return sum(entry.memory_bytes for entry in self._entries.values() if entry.spill_path is None)
+
+    def evict(self, session_id: str) -> bool:
+        """
+        Frees a session's resident state, spilling it to disk if enabled.
+
+        Returns:
+            False if the session is unknown, already spilled, or being evicted or restored.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            # Taking the transition lock under the registry lock means a concurrent
+            # `touch` cannot start restoring before the spill has been written.
+            if entry is None or entry.spill_path is not None or not entry.transition_lock.acquire(blocking=False):
+                return False
+            if self.spill_dir:
+                entry.spill_path = os.path.join(self.spill_dir, session_id)
+
+        try:
+            logger.info(f"Evicting session {session_id} ({entry.memory_bytes / 2**20:.1f} MB, spill: {entry.spill_path}).")
+            self._run_callbacks(self._evict_callbacks, entry, "evicting")
+            with self._lock:
+                entry.memory_bytes = 0
+                discarded = entry.spill_path is None
+                if discarded and self._entries.get(session_id) is entry:
+                    del self._entries[session_id]
+            if discarded:
+                self._run_callbacks(self._discard_callbacks, entry, "discarding")
+        finally:
+            entry.transition_lock.release()
+        return True
+
+    def _expire_spill(self, entry: SessionEntry):
+        """Deletes spilled state for good."""
+        with self._lock:
+            if entry.spill_path is None or not entry.transition_lock.acquire(blocking=False):
+                return
+        try:
+            shutil.rmtree(entry.spill_path, ignore_errors=True)
+            with self._lock:
+                entry.spill_path = None
+                if self._entries.get(entry.session_id) is entry:
+                    del self._entries[entry.session_id]
+            self._run_callbacks(self._discard_callbacks, entry, "discarding")
+        finally:
+            entry.transition_lock.release()
+
+    def sweep(self, now: Optional[float] = None) -> List[str]:
+        """
+        Evicts sessions idle for longer than the TTL, then least recently used
+        sessions until the memory budget is met. The most recently used
+        session is never evicted for the budget. Spilled state older than the
+        spill TTL is deleted for good.
+
+        Candidates are chosen under the registry lock; the evictions run outside it.
+
+        Returns:
+            The IDs of the evicted sessions.
+        """
+        now = now or time.time()
+        to_evict, to_expire = [], []
+        with self._lock:
+            for entry in self._entries.values():
+                idle = now - entry.last_access
+                if entry.spill_path is None and idle > self.ttl_seconds:
+                    to_evict.append(entry.session_id)
+                elif entry.spill_path is not None and idle > self.spill_ttl_seconds:
+                    to_expire.append(entry)
+
+            resident = [entry for entry in self._entries.values() if entry.spill_path is None and entry.session_id not in to_evict]
+            total = sum(entry.memory_bytes for entry in resident)
+            for entry in resident[:-1]:
+                if total <= self.memory_budget_bytes:
+                    break
+                total -= entry.memory_bytes
+                to_evict.append(entry.session_id)
+
+        for entry in to_expire:
+            self._expire_spill(entry)
+        evicted = [session_id for session_id in to_evict if self.evict(session_id)]
+        if evicted:
+            logger.info(f"Evicted sessions: {evicted}. Resident memory now {self.total_memory() / 2**20:.1f} MB.")
+        return evicted
+
+    def start_sweeper(self, interval_seconds: int):
+        """Runs `sweep` periodically on a daemon thread. Safe to call more than once."""
+        with self._lock:
+            if self._sweeper is not None:
+                return
+
+            def run():
+                while True:
+                    time.sleep(interval_seconds)
+                    try:
+                        self.sweep()
+                    except Exception as e:
+                        logger.error(f"Error sweeping sessions: {e}")
+
+            self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+            self._sweeper.start()
+
+
+session_registry = SessionRegistry(
+    ttl_seconds=project_config.SESSION_TTL_SECONDS,
+    memory_budget_bytes=project_config.SESSION_MEMORY_BUDGET_MB * 2**20,
+    spill_dir=project_config.SESSION_SPILL_DIR,
+    spill_ttl_seconds=project_config.SESSION_SPILL_TTL_SECONDS,
+)
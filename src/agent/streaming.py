@@ -0,0 +1,116 @@
+import time
+from typing import Iterator, Optional
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.genai import types
+
+from src.config import logger
+
+# Answers starting with one of these are quiz/translate JSON and are buffered, not streamed.
+STRUCTURED_PREFIXES = ("{", "```json")
+
+
+def _event_text(event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text and not part.thought)
+
+
+class StreamedResponse:
+    """
+    Runs one agent turn and exposes its answer as a stream of text chunks.
+
+    Partial events from the runner are yielded by `text_chunks()` as they
+    arrive. Each model response of the turn is classified on its own: one
+    that turns out to be structured JSON (see `STRUCTURED_PREFIXES`) is not
+    yielded, even after text from an earlier response (before a tool call)
+    was, and the caller reads the complete answer from `text` once the
+    stream is exhausted.
+
+    Attributes:
+        text: The final response text, complete after `text_chunks()` is exhausted.
+        structured: Whether the answer was detected as structured JSON.
+        streamed: Whether any text was yielded to the caller.
+        first_chunk_ms: Time from the start of the turn to the first model text, in milliseconds.
+        total_ms: Time of the whole turn, in milliseconds.
+    """
+
+    def __init__(self, runner: Runner, user_id: str, session_id: str, new_message: types.Content, streaming: bool = True):
+        self.runner = runner
+        self.user_id = user_id
+        self.session_id = session_id
+        self.new_message = new_message
+        self.streaming = streaming
+        self.text = ""
+        self.structured = False
+        self.streamed = False
+        self.first_chunk_ms: Optional[float] = None
+        self.total_ms: Optional[float] = None
+
+    def _classify(self, head: str) -> Optional[bool]:
+        """Returns True/False once `head` shows whether the answer is structured, None while undecided."""
+        head = head.lstrip()
+        if not head:
+            return None
+        for prefix in STRUCTURED_PREFIXES:
+            if head.lower().startswith(prefix):
+                return True
+            if prefix.startswith(head.lower()):
+                return None
+        return False
+
+    def text_chunks(self) -> Iterator[str]:
+        """
+        Yields answer text as it is generated, for use with `st.write_stream`.
+        """
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE if self.streaming else StreamingMode.NONE)
+        start = time.perf_counter()
+        partial_text = ""
+        pending = ""
+        decided: Optional[bool] = None
+
+        events = self.runner.run(
+            user_id=self.user_id,
+            session_id=self.session_id,
+            new_message=self.new_message,
+            run_config=run_config,
+        )
+        for event in events:
+            text = _event_text(event)
+            if text and self.first_chunk_ms is None:
+                self.first_chunk_ms = (time.perf_counter() - start) * 1000
+                logger.info(f"First model text after {self.first_chunk_ms:.1f} ms.")
+
+            if event.partial:
+                partial_text += text
+                if decided is None:
+                    pending += text
+                    decided = self._classify(pending)
+                    if decided is False:
+                        self.streamed = True
+                        yield pending
+                        pending = ""
+                elif decided is False and text:
+                    yield text
+                continue
+
+            if event.is_final_response():
+                self.text = text or partial_text
+            # A complete event ends the current model response (e.g. before a tool call);
+            # the next response is classified on its own.
+            partial_text = ""
+            pending = ""
+            decided = None
+
+        self.structured = self._classify(self.text) is True
+        if not self.streamed and not self.structured and self.text:
+            # Streaming disabled or the model sent no partial events.
+            self.streamed = True
+            yield self.text
+
+        self.total_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Agent turn finished in {self.total_ms:.1f} ms "
+            f"(first text: {self.first_chunk_ms or 0:.1f} ms, structured: {self.structured})."
+        )
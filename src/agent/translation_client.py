@@ -0,0 +1,252 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from src import config as project_config
+from src.config import logger
+
+from .embeddings import estimate_tokens
+
+_RETRY_PATTERNS = (
+    re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+    re.compile(r"retry-after:?\s*([\d.]+)", re.IGNORECASE),
+)
+
+
+class TokenBucket:
+    """
+    Continuously refilling token bucket with a per-minute rate.
+
+    A rate of 0 disables the bucket. Requests larger than the capacity are
+    clamped to it, so a single oversized request waits for a full bucket
+    instead of waiting forever.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        if self.rate <= 0:
+            return
+        amount = min(amount, self.capacity)
+        # Held while waiting so that requests are served in arrival order.
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit: grows by about one slot per limit's worth of
+    successes and halves on every rate-limit error.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 16):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, rate_limited: bool = False):
+        async with self._condition:
+            self.in_flight -= 1
+            if rate_limited:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an exception from the model API is a 429 / quota error."""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if code == 429:
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "rate limit" in message.lower()
+
+
+def parse_retry_after(error: Exception) -> Optional[float]:
+    """
+    Extracts the server's retry hint, in seconds, from an API error.
+
+    Looks at a `Retry-After` response header first, then at the retry delay
+    the Gemini API embeds in its error message.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    message = str(error)
+    for pattern in _RETRY_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0, retry_after: Optional[float] = None) -> float:
+    """
+    Full-jitter exponential backoff, never shorter than the server's retry hint.
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, base)
+    return delay
+
+
+class TranslationClient:
+    """
+    Rate-limited, retrying front end for the translator model.
+
+    All requests run on one background event loop shared by every page and
+    session, so the request/token buckets and the adaptive concurrency limit
+    see the process's whole load. Synchronous callers use `generate_text`;
+    coroutines can await `generate_text_async` from inside the client's loop.
+
+    Args:
+        generate: Async callable taking a prompt and returning the response text.
+        requests_per_minute: Request budget. 0 disables the limit.
+        tokens_per_minute: Estimated input-token budget. 0 disables the limit.
+        max_concurrency: Upper bound for the adaptive concurrency limit.
+        max_retries: Attempts per request before the last error is raised.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str], Awaitable[str]],
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 8,
+        max_retries: int = 6,
+    ):
+        self.generate = generate
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._request_bucket = None
+        self._token_bucket = None
+        self._limiter = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="translation-client", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _ensure_limits(self):
+        # Created lazily so that their asyncio primitives belong to the running loop.
+        if self._limiter is None:
+            self._request_bucket = TokenBucket(self.requests_per_minute)
+            self._token_bucket = TokenBucket(self.tokens_per_minute)
+            self._limiter = AdaptiveLimiter(initial=max(1, self.max_concurrency // 2), maximum=self.max_concurrency)
+
+    async def generate_text_async(self, prompt: str) -> str:
+        """
+        Sends one prompt, waiting for rate-limit budget and retrying failures.
+
+        Raises:
+            The last error once `max_retries` attempts have failed.
+        """
+        self._ensure_limits()
+        tokens = estimate_tokens(prompt)
+        for attempt in range(self.max_retries):
+            await self._request_bucket.acquire(1)
+            await self._token_bucket.acquire(tokens)
+            await self._limiter.acquire()
+            rate_limited = False
+            try:
+                self.requests += 1
+                return await self.generate(prompt)
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                if rate_limited:
+                    self.rate_limited += 1
+                else:
+                    self.errors += 1
+                if attempt == self.max_retries - 1:
+                    raise
+                retry_after = parse_retry_after(e) if rate_limited else None
+                delay = backoff_delay(attempt, retry_after=retry_after)
+                logger.warning(
+                    f"Translation request failed (attempt {attempt+1}/{self.max_retries}, "
+                    f"rate limited: {rate_limited}): {e}. Retrying in {delay:.1f}s."
+                )
+            finally:
+                await self._limiter.release(rate_limited)
+            await asyncio.sleep(delay)
+
+    def generate_text(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Blocking wrapper around `generate_text_async` for worker threads."""
+        future = asyncio.run_coroutine_threadsafe(self.generate_text_async(prompt), self._ensure_loop())
+        return future.result(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+            "concurrency_limit": round(self._limiter.limit, 2) if self._limiter else None,
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_translation_client(generate: Callable[[str], Awaitable[str]]) -> TranslationClient:
+    """
+    Returns the process-wide translation client, created on first use from config.
+
+    Args:
+        generate: Async model call used when the client is first created.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TranslationClient(
+                generate,
+                requests_per_minute=project_config.TRANSLATION_RPM,
+                tokens_per_minute=project_config.TRANSLATION_TPM,
+                max_concurrency=project_config.TRANSLATION_MAX_IN_FLIGHT,
+                max_retries=project_config.TRANSLATION_MAX_RETRIES,
+            )
+            logger.info(
+                f"Translation client: {project_config.TRANSLATION_RPM} RPM, {project_config.TRANSLATION_TPM} TPM, "
+                f"up to {project_config.TRANSLATION_MAX_IN_FLIGHT} requests in flight."
+            )
+        return _client
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from src import config as project_config
+from src.config import logger
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so layout-only differences map to the same entry."""
+    return " ".join(text.split())
+
+
+class TranslationMemory:
+    """
+    Disk-backed translation memory stored in SQLite.
+
+    Entries are keyed by a hash of the normalized source text, the target
+    language and the model name. Once the number of entries exceeds
+    `max_entries`, the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, translation TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_last_access ON translations(last_access)")
+        self._conn.commit()
+        logger.info(f"Translation memory opened at '{path}' (max entries: {max_entries}).")
+
+    @staticmethod
+    def make_key(text: str, target_language: str, model_name: str) -> str:
+        raw = "\x1f".join((normalize_text(text), target_language.strip().lower(), model_name))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: list[str], target_language: str, model_name: str) -> dict[int, str]:
+        """
+        Looks up translations for several source texts.
+
+        Returns:
+            A mapping from the index of each found text in `texts` to its translation.
+        """
+        keys = [self.make_key(text, target_language, model_name) for text in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = list(set(keys[start:start + 500]))
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE translations SET last_access = ? WHERE key = ?", [(now, key) for key in found])
+                self._conn.commit()
+
+            result = {i: found[key] for i, key in enumerate(keys) if key in found}
+            self.hits += len(result)
+            self.misses += len(keys) - len(result)
+        return result
+
+    def put_many(self, items: list[tuple[str, str]], target_language: str, model_name: str):
+        """
+        Stores `(source_text, translation)` pairs and evicts old entries if needed.
+        """
+        if not items:
+            return
+        now = time.time()
+        rows = [(self.make_key(text, target_language, model_name), translation, now) for text, translation in items]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation, last_access) VALUES (?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            logger.debug(f"Evicted {overflow} entries from translation memory.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory | None:
+    """
+    Returns the process-wide translation memory, or None if it is disabled
+    by setting `TRANSLATION_MEMORY_PATH` to an empty string.
+    """
+    global _memory
+    if not project_config.TRANSLATION_MEMORY_PATH:
+        return None
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory(project_config.TRANSLATION_MEMORY_PATH, project_config.TRANSLATION_MEMORY_MAX_ENTRIES)
+        return _memory
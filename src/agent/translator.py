@@ -1,14 +1,17 @@
 import os
-import time
 import json
 import google.generativeai as genai
 
 # Configure the generative AI model
 # genai.configure(api_key="YOUR_API_KEY")
+from src.agent.translation_client import get_translation_client
+from src.agent.translation_memory import get_translation_memory
 from src.config import logger
 
+MODEL_NAME = os.getenv("TRANSLATOR_MODEL_NAME", 'gemma-3-27b-it')
+
 model = genai.GenerativeModel(
-    os.getenv("TRANSLATOR_MODEL_NAME", 'gemma-3-27b-it'),
+    MODEL_NAME,
 )
 
 SYSTEM_INSTRUCTION="""
@@ -23,33 +26,82 @@ SYSTEM_INSTRUCTION="""
         6. I will also provide you some next and previous pages for better translating. DO NOT translate them, just use them for better translating.
         """
 
+MAX_RESPONSE_ATTEMPTS = 3
+
+
+async def _generate(prompt: str) -> str:
+    response = await model.generate_content_async(prompt)
+    return response.text
+
+
 def translate_text(blocks: list[dict], target_language: str, previous_pages: list[str], next_pages: list[str]):
     """
+    Translates text blocks, serving repeated blocks from the translation memory.
 
+    Only blocks missing from the translation memory are sent to the model, and
+    the cached translations are merged back in by block id.
+
+    Args:
+        blocks: A list of `{'id': ..., 'text': ...}` dicts.
+        target_language: The language to translate into.
+        previous_pages: Text of the preceding pages, used as context only.
+        next_pages: Text of the following pages, used as context only.
+
+    Returns:
+        A mapping from block id to translated text.
     """
     logger.info(f"Translating {len(blocks)} blocks to {target_language}.")
-    
+
     if not blocks:
         logger.debug("No blocks provided for translation.")
         return {}
 
+    memory = get_translation_memory()
+    if memory is None:
+        return _request_translation(blocks, target_language, previous_pages, next_pages)
 
-    blocks_json = json.dumps(blocks, ensure_ascii=False)
+    cached = memory.get_many([block['text'] for block in blocks], target_language, MODEL_NAME)
+    translated_map = {blocks[i]['id']: translation for i, translation in cached.items()}
+    missing_blocks = [block for i, block in enumerate(blocks) if i not in cached]
+    logger.info(f"Translation memory: {len(cached)} hits, {len(missing_blocks)} misses.")
 
+    if missing_blocks:
+        new_translations = _request_translation(missing_blocks, target_language, previous_pages, next_pages)
+        translated_map.update(new_translations)
+        memory.put_many(
+            [(block['text'], new_translations[block['id']]) for block in missing_blocks if new_translations.get(block['id'])],
+            target_language,
+            MODEL_NAME,
+        )
+
+    return translated_map
+
+
+def _request_translation(blocks: list[dict], target_language: str, previous_pages: list[str], next_pages: list[str]):
+    """
+    Sends blocks to the translator model and parses its JSON response.
+    """
+    blocks_json = json.dumps(blocks, ensure_ascii=False)
+    previous_context = [f"{page}\n" for page in previous_pages]
+    next_context = [f"{page}\n" for page in next_pages]
 
     # Prepare the context for the generative model
     context = f"\nblocks JSON: ```\n{blocks_json}\n```"
-    context += f"\n\nPrevious pages:\n ```\n{[f"{page}\n" for page in previous_pages]}```"
-    context += f"\nNext pages:\n ```\n{[f"{page}\n" for page in next_pages]}```"
-
-    # Generate a response using the generative model
-    for _ in range(10):
+    context += f"\n\nPrevious pages:\n ```\n{previous_context}```"
+    context += f"\nNext pages:\n ```\n{next_context}```"
+
+    # Rate limits and transient API errors are retried inside the client; this loop only
+    # re-asks when the model returns unusable JSON.
+    client = get_translation_client(_generate)
+    prompt = f"SYSTEM INSTRUCTION: {SYSTEM_INSTRUCTION}\nTarget language: {target_language}.\n{context}"
+    for attempt in range(MAX_RESPONSE_ATTEMPTS):
         try:
-            response = model.generate_content(
-                f"SYSTEM INSTRUCTION: {SYSTEM_INSTRUCTION}\nTarget language: {target_language}.\n{context}"
-            )
+            text_resp = client.generate_text(prompt).strip()
+        except Exception as e:
+            logger.error(f'Translation request failed after retries: {e}')
+            break
 
-            text_resp = response.text.strip()
+        try:
             if text_resp.startswith('```json'):
                 text_resp = text_resp[7:]
             if text_resp.startswith('```'):
@@ -68,23 +120,19 @@ def translate_text(blocks: list[dict], target_language: str, previous_pages: lis
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON response from translator model: {e}. Raw response: {text_resp}")
             logger.info("tring to fix it ...")
-            context = f"Fix this JSON and return the JSON only:\n Error: {e}\n\nJSON: {text_resp}"
             
             try:
-                response = model.generate_content(context)
-                text_resp = response.text.strip()
+                text_resp = client.generate_text(f"Fix this JSON and return the JSON only:\n Error: {e}\n\nJSON: {text_resp}").strip()
                 translated_list = json.loads(text_resp)
                 return {item['id']: item['translation'] for item in translated_list}
 
             except Exception as e:
                 logger.error(f'An unexpected error occurred during fixing JSON: {e}')
-                logger.info("Sleeping for 15 seconds before retrying translation...")
-                time.sleep(15)
 
         except Exception as e:
             logger.error(f'An unexpected error occurred during translation: {e}')
-            logger.info("Sleeping for 15 seconds before retrying translation...")
-            time.sleep(15)
 
+        logger.info(f"Retrying translation ({attempt+1}/{MAX_RESPONSE_ATTEMPTS}) ...")
 
+    logger.info(f"Translation client stats: {client.stats()}")
     return {}
@@ -1,7 +1,21 @@
-from qdrant_client import QdrantClient, models
+import itertools
+import json
+import os
+import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator
+
+import numpy as np
+from qdrant_client import QdrantClient
 from src import config as project_config
 from src.config import logger
 
+from .numpy_store import NumpyVectorStore
+from .vector_store import VectorStore, as_vector_store
+
+VECTORS_FILE = "vectors.npy"
+PAYLOADS_FILE = "payloads.jsonl"
 
 
 
@@ -16,16 +30,54 @@ def get_qdrant_client():
         return QdrantClient(":memory:")
 
 
+def get_vector_store():
+    """
+    Returns the vector database selected by `VECTOR_BACKEND`.
+
+    `qdrant` returns a Qdrant client (see `get_qdrant_client`), `numpy` returns
+    the in-process `NumpyVectorStore`. Every function in this module accepts either.
+    """
+    if project_config.VECTOR_BACKEND == "numpy":
+        logger.info("Initializing in-process NumPy vector store.")
+        return NumpyVectorStore()
+    return get_qdrant_client()
+
 
-def get_all_collection_data(client: QdrantClient, collection_name: str, raise_error: bool = True):
+
+def iter_collection_data(
+    client: QdrantClient | VectorStore,
+    collection_name: str,
+    page_size: int = 256,
+    with_vectors: bool = True,
+) -> Iterator[Any]:
+    """
+    Streams every record of a collection, following scroll offsets page by page.
+
+    Args:
+        client: The Qdrant client or vector store.
+        collection_name: The name of the collection.
+        page_size: The number of records fetched per scroll request.
+        with_vectors: Whether to include the vectors.
+
+    Yields:
+        Records with `id`, `payload` and (optionally) `vector`.
+    """
+    store = as_vector_store(client)
+    offset = None
+    while True:
+        records, offset = store.scroll(collection_name, limit=page_size, offset=offset, with_vectors=with_vectors)
+        yield from records
+        if offset is None:
+            break
+
+
+def get_all_collection_data(client: QdrantClient | VectorStore, collection_name: str, raise_error: bool = True, page_size: int = 1000):
+    """
+    Retrieves every record of a collection. Prefer `iter_collection_data` for large collections.
+    """
     logger.info(f"Retrieving all collection data for '{collection_name}'.")
     try:
-        records, _ = client.scroll(
-            collection_name=collection_name,
-            limit=1000,
-            with_payload=True,
-            with_vectors=True,
-        )
+        records = list(iter_collection_data(client, collection_name, page_size=page_size))
         logger.info(f"Retrieved {len(records)} records from collection '{collection_name}'.")
         return records
     except Exception as e:
@@ -33,32 +85,109 @@ def get_all_collection_data(client: QdrantClient, collection_name: str, raise_er
         if raise_error:
             raise e
         return []
-    
 
 
-def create_collection(client: QdrantClient, collection_name: str, vector_size: int, recreate: bool = True):
+def export_collection(client: QdrantClient | VectorStore, collection_name: str, path: str, page_size: int = 256) -> int:
+    """
+    Snapshots a collection to `path/vectors.npy` (float32 matrix) and
+    `path/payloads.jsonl` (one `{"id", "payload"}` object per row, same order).
+
+    Records are streamed, so memory use does not depend on the collection size.
+
+    Args:
+        client: The Qdrant client or vector store.
+        collection_name: The name of the collection.
+        path: The directory to write the snapshot to.
+        page_size: The number of records fetched per scroll request.
+
+    Returns:
+        The number of exported records.
+    """
+    logger.info(f"Exporting collection '{collection_name}' to '{path}'.")
+    os.makedirs(path, exist_ok=True)
+    vectors_path = os.path.join(path, VECTORS_FILE)
+    raw_path = vectors_path + ".raw"
+    count = 0
+    try:
+        # Taken from the collection, not the first record, so an empty snapshot still records it.
+        dim = as_vector_store(client).get_vector_size(collection_name)
+        # Vectors are streamed to a headerless file first, the .npy header needs the final row count.
+        with open(raw_path, "wb") as raw, open(os.path.join(path, PAYLOADS_FILE), "w", encoding="utf-8") as payloads:
+            for record in iter_collection_data(client, collection_name, page_size=page_size):
+                vector = np.asarray(record.vector, dtype=np.float32)
+                raw.write(vector.tobytes())
+                payloads.write(json.dumps({"id": record.id, "payload": record.payload}, ensure_ascii=False) + "\n")
+                count += 1
+
+        with open(vectors_path, "wb") as f, open(raw_path, "rb") as raw:
+            np.lib.format.write_array_header_1_0(f, {"descr": "<f4", "fortran_order": False, "shape": (count, dim)})
+            shutil.copyfileobj(raw, f)
+        logger.info(f"Exported {count} records from collection '{collection_name}'.")
+        return count
+    except Exception as e:
+        logger.error(f"Error exporting collection '{collection_name}': {e}")
+        raise
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+
+
+def import_collection(client: QdrantClient | VectorStore, collection_name: str, path: str, batch_size: int = 256, recreate: bool = True) -> int:
+    """
+    Restores a collection written by `export_collection` without re-embedding.
+
+    Args:
+        client: The Qdrant client or vector store.
+        collection_name: The name of the collection to create.
+        path: The snapshot directory.
+        batch_size: The number of records upserted per request.
+        recreate: Whether to replace an existing collection.
+
+    Returns:
+        The number of imported records.
+    """
+    logger.info(f"Importing collection '{collection_name}' from '{path}'.")
+    try:
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+        if vectors.ndim != 2 or vectors.shape[1] == 0:
+            raise ValueError(f"Snapshot '{path}' does not record the vector size of the collection.")
+        store = as_vector_store(client)
+        store.create_collection(collection_name, vectors.shape[1], recreate)
+
+        count = 0
+        with open(os.path.join(path, PAYLOADS_FILE), encoding="utf-8") as payloads:
+            while True:
+                rows = [json.loads(line) for line in itertools.islice(payloads, batch_size)]
+                if not rows:
+                    break
+                store.upsert(
+                    collection_name,
+                    [row["id"] for row in rows],
+                    np.asarray(vectors[count:count + len(rows)]).tolist(),
+                    [row["payload"] for row in rows],
+                )
+                count += len(rows)
+        logger.info(f"Imported {count} records into collection '{collection_name}'.")
+        return count
+    except Exception as e:
+        logger.error(f"Error importing collection '{collection_name}': {e}")
+        raise
+
+
+
+def create_collection(client: QdrantClient | VectorStore, collection_name: str, vector_size: int, recreate: bool = True):
     """
     Creates a new collection in Qdrant if it doesn't already exist.
 
     Args:
-        client: The Qdrant client.
+        client: The Qdrant client or vector store.
         collection_name: The name of the collection.
         vector_size: The size of the vectors to be stored.
     """
     logger.info(f"Attempting to create collection '{collection_name}' (recreate: {recreate}).")
     try:
-        if recreate:
-            result = client.recreate_collection(
-                collection_name=collection_name,
-                vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
-            )
-            logger.info(f"Collection '{collection_name}' recreated with result: {result}.")
-        else:
-            result = client.create_collection(
-                collection_name=collection_name,
-                vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
-            )
-            logger.info(f"Collection '{collection_name}' created with result: {result}.")
+        result = as_vector_store(client).create_collection(collection_name, vector_size, recreate)
+        logger.info(f"Collection '{collection_name}' {'recreated' if recreate else 'created'} with result: {result}.")
 
         if not result:
             logger.error(f"Failed to create collection '{collection_name}'.")
@@ -66,38 +195,43 @@ def create_collection(client: QdrantClient, collection_name: str, vector_size: i
         logger.error(f"Error in creating collection '{collection_name}': {e}")
         raise
 
-def upsert_vectors(client: QdrantClient, collection_name: str, vectors, payloads):
+def collection_vector_size(client: QdrantClient | VectorStore, collection_name: str):
+    """
+    Returns the vector size of a collection, or None if it doesn't exist.
+    """
+    store = as_vector_store(client)
+    if not store.collection_exists(collection_name):
+        return None
+    return store.get_vector_size(collection_name)
+
+
+def upsert_vectors(client: QdrantClient | VectorStore, collection_name: str, vectors, payloads, ids=None):
     """
     Inserts or updates vectors in a specified collection.
 
     Args:
-        client: The Qdrant client.
+        client: The Qdrant client or vector store.
         collection_name: The name of the collection.
         vectors: The vectors to be upserted.
         payloads: The corresponding payloads for the vectors.
+        ids: The point IDs. Defaults to `0..len(vectors)-1`.
     """
+    if ids is None:
+        ids = range(len(vectors))
     logger.info(f"Upserting {len(vectors)} vectors into collection '{collection_name}'.")
     try:
-        client.upsert(
-            collection_name=collection_name,
-            points=models.Batch(
-                ids=[i for i in range(len(vectors))],
-                vectors=vectors,
-                payloads=payloads
-            ),
-            wait=True,
-        )
+        as_vector_store(client).upsert(collection_name, ids, vectors, payloads)
         logger.info(f"Successfully upserted {len(vectors)} vectors into collection '{collection_name}'.")
     except Exception as e:
         logger.error(f"Error upserting vectors into collection '{collection_name}': {e}")
         raise
 
-def search_vectors(client: QdrantClient, collection_name: str, query_vector, limit: int = 5):
+def search_vectors(client: QdrantClient | VectorStore, collection_name: str, query_vector, limit: int = 5):
     """
     Searches for similar vectors in a collection.
 
     Args:
-        client: The Qdrant client.
+        client: The Qdrant client or vector store.
         collection_name: The name of the collection.
         query_vector: The vector to search with.
         limit: The maximum number of results to return.
@@ -107,13 +241,93 @@ def search_vectors(client: QdrantClient, collection_name: str, query_vector, lim
     """
     logger.info(f"Searching for {limit} vectors in collection '{collection_name}'.")
     try:
-        results = client.query_points(
-            collection_name=collection_name,
-            query=query_vector,
-            limit=limit,
-        ).points
+        results = as_vector_store(client).search(collection_name, query_vector, limit)
         logger.info(f"Found {len(results)} vectors in collection '{collection_name}'.")
         return results
     except Exception as e:
         logger.error(f"Error searching vectors in collection '{collection_name}': {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def retrieve_points(client: QdrantClient | VectorStore, collection_name: str, ids):
+    """
+    Fetches the payloads of specific points.
+
+    Args:
+        client: The Qdrant client or vector store.
+        collection_name: The name of the collection.
+        ids: The point IDs to fetch.
+
+    Returns:
+        The found records, in the order of `ids`.
+    """
+    logger.info(f"Retrieving {len(ids)} points from collection '{collection_name}'.")
+    try:
+        records = {record.id: record for record in as_vector_store(client).retrieve(collection_name, ids)}
+        return [records[point_id] for point_id in ids if point_id in records]
+    except Exception as e:
+        logger.error(f"Error retrieving points from collection '{collection_name}': {e}")
+        raise
+
+
+def delete_vectors(client: QdrantClient | VectorStore, collection_name: str, ids):
+    """
+    Deletes points from a collection.
+
+    Args:
+        client: The Qdrant client or vector store.
+        collection_name: The name of the collection.
+        ids: The point IDs to delete.
+    """
+    logger.info(f"Deleting {len(ids)} vectors from collection '{collection_name}'.")
+    try:
+        as_vector_store(client).delete(collection_name, ids)
+    except Exception as e:
+        logger.error(f"Error deleting vectors from collection '{collection_name}': {e}")
+        raise
+
+
+class BatchUpserter:
+    """
+    Upserts points in size-bounded batches on a small thread pool.
+
+    `add` returns as soon as its batches are queued, so callers can prepare
+    the next batch while earlier ones are being written. At most two batches
+    per worker are in flight. Stores that can't take concurrent writes get a
+    single worker. Use as a context manager; leaving it waits for all writes
+    and re-raises the first error.
+    """
+
+    def __init__(self, client: QdrantClient | VectorStore, collection_name: str, batch_size: int, max_workers: int):
+        self.client = client
+        self.collection_name = collection_name
+        self.batch_size = max(1, batch_size)
+        if not as_vector_store(client).supports_concurrent_writes:
+            max_workers = 1
+        self.max_in_flight = 2 * max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="upsert")
+        self._in_flight = deque()
+
+    def add(self, ids, vectors, payloads):
+        ids = list(ids)
+        for start in range(0, len(ids), self.batch_size):
+            end = start + self.batch_size
+            while len(self._in_flight) >= self.max_in_flight:
+                self._in_flight.popleft().result()
+            self._in_flight.append(self._executor.submit(
+                upsert_vectors, self.client, self.collection_name, vectors[start:end], payloads[start:end], ids[start:end]
+            ))
+
+    def wait(self):
+        while self._in_flight:
+            self._in_flight.popleft().result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.wait()
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
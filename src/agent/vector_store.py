@@ -0,0 +1,171 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from qdrant_client import QdrantClient, models
+from qdrant_client.local.qdrant_local import QdrantLocal
+
+from src import config as project_config
+
+
+@dataclass
+class Record:
+    id: Any
+    payload: Dict[str, Any] = field(default_factory=dict)
+    vector: Optional[List[float]] = None
+
+
+@dataclass
+class ScoredPoint:
+    id: Any
+    score: float
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+class VectorStore(ABC):
+    """
+    Minimal interface the RAG pipeline needs from a vector database.
+
+    All collections use cosine similarity.
+    """
+
+    # Whether several threads may write to the store at the same time.
+    supports_concurrent_writes = True
+
+    @abstractmethod
+    def create_collection(self, collection_name: str, vector_size: int, recreate: bool = True) -> bool:
+        ...
+
+    @abstractmethod
+    def collection_exists(self, collection_name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete_collection(self, collection_name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def get_vector_size(self, collection_name: str) -> int:
+        ...
+
+    @abstractmethod
+    def upsert(self, collection_name: str, ids: Sequence, vectors: Sequence, payloads: Sequence[Dict[str, Any]]):
+        ...
+
+    @abstractmethod
+    def delete(self, collection_name: str, ids: Sequence):
+        ...
+
+    @abstractmethod
+    def search(self, collection_name: str, query_vector: Sequence[float], limit: int) -> List[ScoredPoint]:
+        ...
+
+    @abstractmethod
+    def retrieve(self, collection_name: str, ids: Sequence) -> List[Record]:
+        """
+        Returns the records (payloads only) for the given ids; missing ids are skipped.
+        """
+        ...
+
+    @abstractmethod
+    def scroll(self, collection_name: str, limit: int, offset=None, with_vectors: bool = True) -> Tuple[List[Record], Any]:
+        """
+        Returns a page of records and the offset of the next page, or None after the last page.
+        """
+        ...
+
+
+class QdrantVectorStore(VectorStore):
+    """
+    `VectorStore` backed by a `QdrantClient` (server or local mode).
+
+    With quantization enabled, the original vectors are kept on disk and
+    searches rescore the quantized candidates with them. Qdrant local mode
+    ignores these settings.
+    """
+
+    def __init__(self, client: QdrantClient, quantization: Optional[str] = None, oversampling: Optional[float] = None):
+        self.client = client
+        # Local mode is plain Python without any locking.
+        self.supports_concurrent_writes = not isinstance(getattr(client, "_client", None), QdrantLocal)
+        self.quantization = quantization or project_config.VECTOR_QUANTIZATION
+        self.oversampling = oversampling or project_config.RESCORE_OVERSAMPLING
+
+    def _quantization_config(self):
+        if self.quantization == "int8":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, always_ram=True)
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def create_collection(self, collection_name, vector_size, recreate=True):
+        quantization_config = self._quantization_config()
+        vectors_config = models.VectorParams(
+            size=vector_size,
+            distance=models.Distance.COSINE,
+            on_disk=quantization_config is not None,
+        )
+        if recreate:
+            return self.client.recreate_collection(
+                collection_name=collection_name, vectors_config=vectors_config, quantization_config=quantization_config
+            )
+        return self.client.create_collection(
+            collection_name=collection_name, vectors_config=vectors_config, quantization_config=quantization_config
+        )
+
+    def collection_exists(self, collection_name):
+        return self.client.collection_exists(collection_name)
+
+    def delete_collection(self, collection_name):
+        return self.client.delete_collection(collection_name)
+
+    def get_vector_size(self, collection_name):
+        return self.client.get_collection(collection_name).config.params.vectors.size
+
+    def upsert(self, collection_name, ids, vectors, payloads):
+        self.client.upsert(
+            collection_name=collection_name,
+            points=models.Batch(ids=list(ids), vectors=vectors, payloads=payloads),
+            wait=True,
+        )
+
+    def delete(self, collection_name, ids):
+        self.client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=list(ids)),
+            wait=True,
+        )
+
+    def search(self, collection_name, query_vector, limit):
+        search_params = None
+        if self._quantization_config() is not None:
+            search_params = models.SearchParams(
+                quantization=models.QuantizationSearchParams(rescore=True, oversampling=self.oversampling)
+            )
+        return self.client.query_points(
+            collection_name=collection_name,
+            query=query_vector,
+            limit=limit,
+            search_params=search_params,
+        ).points
+
+    def retrieve(self, collection_name, ids):
+        return self.client.retrieve(collection_name=collection_name, ids=list(ids), with_payload=True)
+
+    def scroll(self, collection_name, limit, offset=None, with_vectors=True):
+        return self.client.scroll(
+            collection_name=collection_name,
+            limit=limit,
+            offset=offset,
+            with_payload=True,
+            with_vectors=with_vectors,
+        )
+
+
+def as_vector_store(client) -> VectorStore:
+    """Wraps a raw `QdrantClient`; `VectorStore` instances are returned unchanged."""
+    if isinstance(client, VectorStore):
+        return client
+    return QdrantVectorStore(client)
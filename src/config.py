@@ -8,8 +8,50 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "..", "data", "uploads")
 UPLOAD_PDF = os.path.join(UPLOAD_FOLDER, 'upload.pdf')
 PROCESSED_PDF = os.path.join(BASE_DIR, "..", "data", "processed.pdf")
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "true").lower() == "true"
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 3600))
+SESSION_MEMORY_BUDGET_MB = int(os.getenv("SESSION_MEMORY_BUDGET_MB", 1024))
+SESSION_SPILL_DIR = os.getenv("SESSION_SPILL_DIR", os.path.join(BASE_DIR, "..", "data", "spill"))
+SESSION_SPILL_TTL_SECONDS = int(os.getenv("SESSION_SPILL_TTL_SECONDS", 24 * 3600))
+SESSION_SWEEP_INTERVAL = int(os.getenv("SESSION_SWEEP_INTERVAL", 60))
 EMBEDDING_URL = os.getenv("EMBEDDING_URL", "")
-RECREATE_COLLECTION = not DEBUG
+SELFHOSTED_EMBEDDING_MODEL = os.getenv("SELFHOSTED_EMBEDDING_MODEL", "gemmaembedding-300m")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 100))
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", 16000))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", 4))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", 5))
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 0))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 1024))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(BASE_DIR, "..", "data", "embedding_cache"))
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+RESCORE_OVERSAMPLING = float(os.getenv("RESCORE_OVERSAMPLING", 4.0))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 64))
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", 256))
+UPSERT_CONCURRENCY = int(os.getenv("UPSERT_CONCURRENCY", 4))
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", 4))
+TRANSLATION_PACK_TOKENS = int(os.getenv("TRANSLATION_PACK_TOKENS", 1500))
+TRANSLATION_CHECKPOINT_DIR = os.getenv("TRANSLATION_CHECKPOINT_DIR", os.path.join(BASE_DIR, "..", "data", "translation_jobs"))
+TRANSLATION_JOB_WORKERS = int(os.getenv("TRANSLATION_JOB_WORKERS", 2))
+TRANSLATION_JOB_TTL_SECONDS = int(os.getenv("TRANSLATION_JOB_TTL_SECONDS", 3600))
+TRANSLATION_POLL_SECONDS = float(os.getenv("TRANSLATION_POLL_SECONDS", 2))
+PDF_VIEW_DPI = int(os.getenv("PDF_VIEW_DPI", 110))
+PAGE_IMAGE_CACHE_MB = int(os.getenv("PAGE_IMAGE_CACHE_MB", 128))
+DOCUMENT_POOL_SIZE = int(os.getenv("DOCUMENT_POOL_SIZE", 8))
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", min(4, os.cpu_count() or 1)))
+EXTRACTION_RANGE_PAGES = int(os.getenv("EXTRACTION_RANGE_PAGES", 64))
+EXTRACTION_PARALLEL_MIN_PAGES = int(os.getenv("EXTRACTION_PARALLEL_MIN_PAGES", 200))
+TRANSLATION_SUBSET_FONTS = os.getenv("TRANSLATION_SUBSET_FONTS", "true").lower() == "true"
+TRANSLATION_SAVE_GARBAGE = int(os.getenv("TRANSLATION_SAVE_GARBAGE", 3))
+TRANSLATION_SAVE_DEFLATE = os.getenv("TRANSLATION_SAVE_DEFLATE", "true").lower() == "true"
+# Defaults match the Gemini API free tier for gemma-3-27b-it; raise them for paid tiers.
+TRANSLATION_RPM = int(os.getenv("TRANSLATION_RPM", 30))
+TRANSLATION_TPM = int(os.getenv("TRANSLATION_TPM", 15000))
+TRANSLATION_MAX_IN_FLIGHT = int(os.getenv("TRANSLATION_MAX_IN_FLIGHT", 8))
+TRANSLATION_MAX_RETRIES = int(os.getenv("TRANSLATION_MAX_RETRIES", 6))
+TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", os.path.join(BASE_DIR, "..", "data", "translation_memory.sqlite3"))
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", 200_000))
 
 session_id = None
 user_id = None
@@ -1,16 +1,20 @@
 import json
 import os
 import tempfile
+import time
 import uuid
 
 import streamlit as st
 from dotenv import load_dotenv
 from google.genai import types
 
-from src.agent.core import create_agent_runner, init_session
+from src.agent.core import get_agent_runner, init_session, warm_up_agent_runner
 from src.agent.schemas import QuizOutput
 from src.agent.rag import setup_rag_pipeline
-from src.agent.vector_db import get_all_collection_data, get_qdrant_client
+from src.agent.session_registry import session_registry
+from src.agent.streaming import StreamedResponse
+from src.agent.vector_db import collection_vector_size, get_all_collection_data, get_vector_store
+from src.pdf_translation.jobs import job_manager
 from src.ui.components import display_pdf_translation, render_quiz
 from src import config
 from src.config import logger
@@ -27,7 +31,10 @@ def main():
     st.title("PDF Agent")
 
     if not config.qdrant_client:
-        config.qdrant_client = get_qdrant_client()
+        config.qdrant_client = get_vector_store()
+        session_registry.start_sweeper(config.SESSION_SWEEP_INTERVAL)
+        if config.AGENT_WARMUP:
+            warm_up_agent_runner()
 
     user_id = "test-user"
 
@@ -35,6 +42,8 @@ def main():
         st.session_state.session_id = str(uuid.uuid4())
         config.session_id = st.session_state.session_id
         config.user_id = user_id
+    # Restores the session's index if it was spilled to disk while idle.
+    session_registry.touch(st.session_state.session_id, user_id)
     init_session(st.session_state.session_id, user_id)
 
     if not config.DEBUG:
@@ -47,6 +56,10 @@ def main():
                 with open(config.UPLOAD_PDF, "wb") as f:
                     f.write(uploaded_file.getbuffer())
 
+            # Spilled state past its TTL is gone for good, so the document is indexed again.
+            if "rag_pipeline_initialized" in st.session_state and collection_vector_size(config.qdrant_client, st.session_state.session_id) is None:
+                del st.session_state.rag_pipeline_initialized
+
             if "rag_pipeline_initialized" not in st.session_state:
                 with st.spinner("Processing PDF for Q&A... This may take a while."):
                     logger.info('Processing PDF for Q&A...')
@@ -60,10 +73,12 @@ def main():
         if "messages" not in st.session_state:
             st.session_state.messages = []
 
-        for message in st.session_state.messages:
+        # Only the latest translation shows the viewer; they all show the same files.
+        latest_translation = max((i for i, message in enumerate(st.session_state.messages) if message.get("is_translate")), default=None)
+        for i, message in enumerate(st.session_state.messages):
             with st.chat_message(message["role"]):
-                if "is_translate" in message and message["is_translate"]:
-                    display_pdf_translation(config.UPLOAD_PDF, config.PROCESSED_PDF)
+                if i == latest_translation:
+                    display_pdf_translation(config.UPLOAD_PDF, config.PROCESSED_PDF, job_id=message.get("job_id"))
 
                 st.markdown(message["content"])
         
@@ -84,15 +99,24 @@ def main():
                         parts=[types.Part(text=prompt)]
                     )
 
-                    agent_runner = create_agent_runner()
-
-                    events = agent_runner.run(user_id=user_id, session_id=st.session_state.session_id, new_message=content)
-                    response = ""
-
-                    for ev in events:
-                        if ev.is_final_response():
-                            response: str = ev.content.parts[0].text
+                    turn_start = time.perf_counter()
+                    agent_runner = get_agent_runner()
+                    runner_ms = (time.perf_counter() - turn_start) * 1000
+
+                    model_start = time.perf_counter()
+                    stream = StreamedResponse(
+                        agent_runner,
+                        user_id=user_id,
+                        session_id=st.session_state.session_id,
+                        new_message=content,
+                        streaming=config.STREAM_RESPONSES,
+                    )
+                    # Plain answers render as they are generated; quiz/translate JSON is buffered.
+                    st.write_stream(stream.text_chunks())
+                    response = stream.text
 
+                    model_ms = (time.perf_counter() - model_start) * 1000
+                    logger.info(f"Turn timing: runner {runner_ms:.1f} ms, model {model_ms:.1f} ms, first text {stream.first_chunk_ms or 0:.1f} ms.")
                     logger.info(f"Model raw response: {response}")
 
                     # try to parse the json
@@ -125,19 +149,24 @@ def main():
 
                     elif "translate_pdf" in response:
                         logger.info('Entering PDF translation mode ...')
-                        
-                        display_pdf_translation(config.UPLOAD_PDF, config.PROCESSED_PDF)
-                        st.markdown(response["model_response"])
+
+                        # The model is asked to echo the job id; fall back to the session's latest job.
+                        job = job_manager.get(str(response.get("job_id"))) or job_manager.latest(st.session_state.session_id)
+                        job_id = job.job_id if job else None
                         st.session_state.messages.append(
                             {
                                 "role": "assistant",
                                 "content": response["model_response"],
                                 "is_translate": True,
+                                "job_id": job_id,
                             }
                         )
+                        # Re-renders the history, which moves the viewer to this message.
+                        st.rerun()
                     else:
                         logger.info(f"Displaying regular model response: {response.get('model_response', '')}")
-                        st.markdown(response["model_response"])
+                        if not stream.streamed:
+                            st.markdown(response["model_response"])
                         st.session_state.messages.append(
                             {"role": "assistant", "content": response["model_response"]}
                         )
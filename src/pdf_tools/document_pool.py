@@ -0,0 +1,147 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import fitz  # PyMuPDF
+
+from src.config import DOCUMENT_POOL_SIZE, logger
+
+from .utils import bytes_sha256, file_sha256
+
+
+class PooledDocument:
+    """
+    A parsed document shared through `DocumentPool`.
+
+    MuPDF documents are not thread-safe: hold `lock` around every use of
+    `document`, including pages loaded from it.
+    """
+
+    def __init__(self, file_hash: str, document: fitz.Document):
+        self.file_hash = file_hash
+        self.document = document
+        self.page_count = len(document)
+        self.lock = threading.RLock()
+        self.users = 0
+        self.evicted = False
+
+    def get_page_text(self, page_num: int, *args, **kwargs):
+        """`page.get_text(*args, **kwargs)` of one page, under the document lock."""
+        with self.lock:
+            return self.document.load_page(page_num).get_text(*args, **kwargs)
+
+
+class DocumentPool:
+    """
+    Keeps parsed PDFs open, keyed by file content hash, with LRU eviction.
+
+    Documents are opened from an in-memory copy of the file, so a file that
+    is overwritten in place (a new upload to the same path) gets a new entry
+    and never changes a document someone is still reading. The entry of the
+    previous content is dropped once no other path has it, so a file that is
+    rewritten repeatedly (a job's partial output) holds one slot, not one per
+    version. Entries in use are not closed until they are released.
+    """
+
+    def __init__(self, max_documents: int):
+        self.max_documents = max(1, max_documents)
+        self._entries: "OrderedDict[str, PooledDocument]" = OrderedDict()
+        # Content hash last opened for each path.
+        self._path_hashes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, pdf_path: str) -> PooledDocument:
+        """
+        Returns the pooled document for the current content of `pdf_path`, opening it if needed.
+
+        Every `acquire` must be paired with a `release`; prefer `open`.
+        """
+        path = os.path.abspath(pdf_path)
+        file_hash = file_sha256(pdf_path)
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is not None:
+                self._entries.move_to_end(file_hash)
+                entry.users += 1
+                self._track_path(path, file_hash)
+                return entry
+
+        # Parsed outside the pool lock; a concurrent open of the same file is discarded below.
+        with open(pdf_path, "rb") as f:
+            data = f.read()
+        file_hash = bytes_sha256(data)
+        document = fitz.open(stream=data, filetype="pdf")
+
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is not None:
+                document.close()
+            else:
+                entry = PooledDocument(file_hash, document)
+                self._entries[file_hash] = entry
+                logger.debug(f"Opened '{pdf_path}' ({entry.page_count} pages) in the document pool.")
+            self._entries.move_to_end(file_hash)
+            entry.users += 1
+            self._track_path(path, file_hash)
+            self._evict()
+        return entry
+
+    def release(self, entry: PooledDocument):
+        with self._lock:
+            entry.users -= 1
+            if entry.evicted and entry.users == 0:
+                self._close(entry)
+
+    @contextmanager
+    def open(self, pdf_path: str) -> Iterator[PooledDocument]:
+        """Context manager around `acquire` and `release`."""
+        entry = self.acquire(pdf_path)
+        try:
+            yield entry
+        finally:
+            self.release(entry)
+
+    def _track_path(self, path: str, file_hash: str):
+        # Called with `_lock` held.
+        previous = self._path_hashes.get(path)
+        self._path_hashes[path] = file_hash
+        if previous is not None and previous != file_hash and previous not in self._path_hashes.values():
+            self._drop(previous)
+
+    def _drop(self, file_hash: str):
+        # Called with `_lock` held.
+        entry = self._entries.pop(file_hash, None)
+        for path in [path for path, path_hash in self._path_hashes.items() if path_hash == file_hash]:
+            del self._path_hashes[path]
+        if entry is None:
+            return
+        entry.evicted = True
+        if entry.users == 0:
+            self._close(entry)
+
+    def _evict(self):
+        # Called with `_lock` held.
+        while len(self._entries) > self.max_documents:
+            self._drop(next(iter(self._entries)))
+
+    def _close(self, entry: PooledDocument):
+        with entry.lock:
+            entry.document.close()
+        logger.debug(f"Closed pooled document {entry.file_hash[:12]}.")
+
+    def close(self, pdf_path: Optional[str] = None, file_hash: Optional[str] = None):
+        """
+        Closes the document of `pdf_path` (or `file_hash`), or every document if neither is given.
+
+        Documents still in use are closed when their last user releases them.
+        """
+        if pdf_path is not None:
+            file_hash = file_sha256(pdf_path)
+        with self._lock:
+            for key in list(self._entries) if file_hash is None else [file_hash]:
+                self._drop(key)
+
+
+document_pool = DocumentPool(DOCUMENT_POOL_SIZE)
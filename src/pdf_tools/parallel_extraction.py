@@ -0,0 +1,127 @@
+import math
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterator, List, Optional, Tuple, TypeVar
+
+import fitz  # PyMuPDF
+
+from src.config import EXTRACTION_PARALLEL_MIN_PAGES, EXTRACTION_RANGE_PAGES, EXTRACTION_WORKERS, logger
+
+from .document_pool import document_pool
+
+T = TypeVar("T")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Returns the shared extraction process pool, created on first use.
+
+    Workers are spawned rather than forked: the app runs other threads (the
+    translation client loop, job workers) whose locks a forked child could
+    inherit in a held state.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _executor_workers = workers
+            logger.info(f"Started {workers} extraction worker processes.")
+        return _executor
+
+
+def _discard_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _extract_range(pdf_path: str, start: int, stop: int, extract_page: Callable[[fitz.Page], T]) -> List[T]:
+    """Worker entry point: opens the file itself and extracts pages `start` to `stop - 1`."""
+    with fitz.open(pdf_path) as document:
+        return [extract_page(document.load_page(page_num)) for page_num in range(start, stop)]
+
+
+def page_ranges(page_count: int, workers: int, range_pages: int = EXTRACTION_RANGE_PAGES) -> List[Tuple[int, int]]:
+    """
+    Splits `range(page_count)` into contiguous `(start, stop)` ranges.
+
+    Ranges hold at most `range_pages` pages, so the first pages come back
+    early and workers that finish sooner pick up more of the document.
+    """
+    size = max(1, min(range_pages, math.ceil(page_count / max(1, workers))))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def map_pages(pdf_path: str, extract_page: Callable[[fitz.Page], T], workers: Optional[int] = None) -> Iterator[T]:
+    """
+    Applies `extract_page` to every page of a PDF and yields the results in page order.
+
+    Documents with at least `EXTRACTION_PARALLEL_MIN_PAGES` pages are split
+    into contiguous page ranges that are extracted by a pool of worker
+    processes, each opening the file itself. At most two ranges per worker
+    are in flight, so a slow consumer does not let results pile up in
+    memory. Smaller documents, or `workers` of 1, are read in this process
+    through `document_pool`.
+
+    Args:
+        pdf_path: The PDF to read.
+        extract_page: Called with each `fitz.Page`. It must be a module-level
+            function, and its result picklable, to run in worker processes.
+        workers: Number of worker processes. Defaults to `EXTRACTION_WORKERS`.
+
+    Yields:
+        `extract_page(page)` for every page, in page order.
+    """
+    workers = EXTRACTION_WORKERS if workers is None else workers
+    page_count = 0
+    if workers > 1:
+        # Only the page count is read here; the workers open the file themselves.
+        with fitz.open(pdf_path) as document:
+            page_count = len(document)
+
+    if page_count < EXTRACTION_PARALLEL_MIN_PAGES:
+        with document_pool.open(pdf_path) as document:
+            for page_num in range(document.page_count):
+                with document.lock:
+                    result = extract_page(document.document.load_page(page_num))
+                yield result
+        return
+
+    ranges = deque(page_ranges(page_count, workers))
+    logger.info(f"Extracting {page_count} pages of '{pdf_path}' in {len(ranges)} ranges on {workers} processes.")
+    executor = _get_executor(workers)
+    # (start, stop, future) in page order
+    in_flight = deque()
+    try:
+        while ranges or in_flight:
+            while ranges and len(in_flight) < workers * 2:
+                start, stop = ranges.popleft()
+                future = executor.submit(_extract_range, pdf_path, start, stop, extract_page) if executor else None
+                in_flight.append((start, stop, future))
+
+            start, stop, future = in_flight.popleft()
+            try:
+                results = future.result() if future else _extract_range(pdf_path, start, stop, extract_page)
+            except BrokenProcessPool as e:
+                # e.g. a worker killed for memory. The rest of the document is read in this process.
+                logger.warning(f"Extraction worker pool failed, continuing without it: {e}")
+                _discard_executor()
+                executor = None
+                in_flight = deque((range_start, range_stop, None) for range_start, range_stop, _ in in_flight)
+                results = _extract_range(pdf_path, start, stop, extract_page)
+            yield from results
+    finally:
+        for _, _, future in in_flight:
+            if future:
+                future.cancel()
@@ -1,13 +1,53 @@
-from typing import List
+import re
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from src.config import logger
 
 import fitz  # PyMuPDF
 
+from .parallel_extraction import map_pages
+
+
+def _page_text(page: fitz.Page) -> str:
+    return str(page.get_text())
+
+
+def iter_pages(pdf_path: str, workers: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Lazily extracts text from a PDF file, one page at a time.
+
+    Only the text of the pages currently being read is held in memory, so
+    callers can start processing before the whole document has been
+    extracted. Large documents are extracted by worker processes, see
+    `map_pages`.
+
+    Args:
+        pdf_path: The path to the PDF file.
+        workers: Number of extraction processes. Defaults to `EXTRACTION_WORKERS`.
+
+    Yields:
+        `(page_number, text)` tuples, where `page_number` starts at 1.
+    """
+    pages = map_pages(pdf_path, _page_text, workers=workers)
+    try:
+        # The file is opened on the first page.
+        first = next(pages, None)
+    except Exception as e:
+        logger.error(f"Error opening {pdf_path}: {e}")
+        return
+    if first is None:
+        return
+
+    yield 1, first
+    yield from enumerate(pages, start=2)
+
 
 def extract_text_from_pdf(pdf_path: str) -> str:
     """
     Extracts text from a given PDF file.
 
+    Prefer `iter_pages` for large documents, this materializes the whole text.
+
     Args:
         pdf_path: The path to the PDF file.
 
@@ -15,11 +55,7 @@ def extract_text_from_pdf(pdf_path: str) -> str:
         The extracted text from the PDF.
     """
     try:
-        document = fitz.open(pdf_path)
-        text = ""
-        for page_num in range(len(document)):
-            page = document.load_page(page_num)
-            text += str(page.get_text())
+        text = "".join(page_text for _, page_text in iter_pages(pdf_path))
         logger.info(f"Successfully extracted text from {pdf_path}")
         if not text:
             logger.warning(f"Extracted text from {pdf_path} is empty.")
@@ -54,4 +90,115 @@ def chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> L
         chunks.append(text[start:end])
         start += chunk_size - chunk_overlap
     logger.info(f"Text chunked into {len(chunks)} chunks.")
-    return chunks
\ No newline at end of file
+    return chunks
+
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;:\u3002\uff01\uff1f])\s+")
+
+
+def _split_oversized(text: str, chunk_size: int, length_function: Callable[[str], int]) -> Iterator[str]:
+    """
+    Splits a single sentence that is longer than `chunk_size` on word boundaries,
+    falling back to hard character cuts for words that are too long on their own.
+    """
+    piece, piece_length = [], 0
+    for word in text.split(" "):
+        word_length = length_function(word)
+        if word_length > chunk_size:
+            if piece:
+                yield " ".join(piece)
+                piece, piece_length = [], 0
+            step = max(1, len(word) * chunk_size // word_length)
+            for start in range(0, len(word), step):
+                yield word[start:start + step]
+            continue
+        if piece and piece_length + 1 + word_length > chunk_size:
+            yield " ".join(piece)
+            piece, piece_length = [], 0
+        piece.append(word)
+        piece_length += word_length + (1 if piece_length else 0)
+    if piece:
+        yield " ".join(piece)
+
+
+def iter_page_chunks(
+    pages: Iterable[Tuple[int, str]],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    length_function: Optional[Callable[[str], int]] = None,
+) -> Iterator[Dict]:
+    """
+    Splits per-page text into chunks on paragraph and sentence boundaries.
+
+    Chunks may span pages; each one records the first and last page it was
+    taken from. Consecutive chunks share whole sentences of up to
+    `chunk_overlap` length. Every sentence is measured once and enters and
+    leaves the window once, so the run time is linear in the document length.
+
+    Args:
+        pages: `(page_number, text)` tuples, e.g. from `iter_pages`.
+        chunk_size: The maximum length of each chunk.
+        chunk_overlap: The maximum length shared by consecutive chunks.
+        length_function: Measures text length, e.g.
+            `lambda text: len(tokenizer.encode(text))`. Defaults to `len`.
+
+    Yields:
+        `{"text": str, "start_page": int, "end_page": int}` dicts.
+    """
+    length_function = length_function or len
+    logger.debug(f"Chunking pages with chunk_size={chunk_size}, chunk_overlap={chunk_overlap}")
+
+    # (text, page_number, length, separator before it)
+    window = deque()
+    window_length = 0
+    has_new_units = False
+    chunk_count = 0
+
+    def emit():
+        text = window[0][0] + "".join(separator + unit for unit, _, _, separator in list(window)[1:])
+        return {"text": text, "start_page": window[0][1], "end_page": window[-1][1]}
+
+    separator_lengths = {" ": length_function(" "), "\n\n": length_function("\n\n")}
+
+    for page_number, page_text in pages:
+        for paragraph in _PARAGRAPH_SPLIT.split(page_text):
+            paragraph = " ".join(paragraph.split())
+            if not paragraph:
+                continue
+
+            separator = "\n\n"
+            for sentence in _SENTENCE_SPLIT.split(paragraph):
+                sentence_length = length_function(sentence)
+                units = [(sentence, sentence_length)]
+                if sentence_length > chunk_size:
+                    units = [(part, length_function(part)) for part in _split_oversized(sentence, chunk_size, length_function)]
+
+                for unit, unit_length in units:
+                    added_length = unit_length + (separator_lengths[separator] if window else 0)
+                    if window and window_length + added_length > chunk_size:
+                        if has_new_units:
+                            yield emit()
+                            chunk_count += 1
+                            has_new_units = False
+                        # Keep a tail of whole sentences as overlap, and make room for the new unit.
+                        while window and (
+                            window_length > chunk_overlap
+                            or window_length + separator_lengths[separator] + unit_length > chunk_size
+                        ):
+                            _, _, dropped_length, _ = window.popleft()
+                            window_length -= dropped_length
+                            if window:
+                                window_length -= separator_lengths[window[0][3]]
+                        added_length = unit_length + (separator_lengths[separator] if window else 0)
+
+                    window.append((unit, page_number, unit_length, separator))
+                    window_length += added_length
+                    has_new_units = True
+                    separator = " "
+
+    if window and has_new_units:
+        yield emit()
+        chunk_count += 1
+    logger.info(f"Pages chunked into {chunk_count} chunks.")
+
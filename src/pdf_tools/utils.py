@@ -0,0 +1,35 @@
+import hashlib
+import os
+import threading
+from typing import Dict, Tuple
+
+# path -> (mtime_ns, size, sha256), so an unchanged file is hashed once.
+_file_hashes: Dict[str, Tuple[int, int, str]] = {}
+_file_hashes_lock = threading.Lock()
+
+
+def bytes_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    """
+    sha256 of a file's content, read in 1 MB chunks.
+
+    Results are memoized by path, modification time and size, so repeated
+    calls on an unchanged file only cost an `os.stat`.
+    """
+    stat = os.stat(path)
+    path = os.path.abspath(path)
+    with _file_hashes_lock:
+        cached = _file_hashes.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(2**20), b""):
+            digest.update(chunk)
+    with _file_hashes_lock:
+        _file_hashes[path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+    return digest.hexdigest()
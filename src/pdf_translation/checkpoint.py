@@ -0,0 +1,152 @@
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+from typing import Dict, Optional, Set
+
+import fitz  # PyMuPDF
+
+from src.config import logger
+from src.pdf_tools.utils import file_sha256
+
+
+def checkpoint_directory(root: str, input_pdf_path: str, target_language: str) -> str:
+    """Checkpoint directory of the job translating `input_pdf_path` into `target_language`."""
+    language = re.sub(r"[^a-z0-9]+", "-", target_language.lower()).strip("-") or "unknown"
+    return os.path.join(root, f"{file_sha256(input_pdf_path)[:32]}-{language}")
+
+
+class TranslationCheckpoint:
+    """
+    On-disk progress of one translation job, keyed by document hash and target language.
+
+    Layout of the checkpoint directory:
+
+    - `pages/<page_num>.json`: the translated block map of a page, written as
+      soon as the page comes back from the model.
+    - `partial.pdf`: the output document, saved incrementally after each page
+      is applied.
+    - `applied.json`: the pages already applied to `partial.pdf`.
+
+    Re-applying a page is harmless (the page is redacted before insertion), so
+    the files only need to be written in that order to be safe to resume from.
+
+    A checkpoint is used as a context manager, which holds an exclusive lock
+    on `<directory>.lock`: a second job on the same content and language, in
+    this process or another, waits for the first to finish instead of
+    writing to the same files.
+    """
+
+    def __init__(self, root: str, input_pdf_path: str, target_language: str):
+        self.directory = checkpoint_directory(root, input_pdf_path, target_language)
+        self.pages_dir = os.path.join(self.directory, "pages")
+        self.partial_path = os.path.join(self.directory, "partial.pdf")
+        self.applied_path = os.path.join(self.directory, "applied.json")
+        self.lock_path = f"{self.directory}.lock"
+        self.input_pdf_path = input_pdf_path
+        self.applied: Set[int] = set()
+        self.incremental = True
+        self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+
+    def __enter__(self) -> "TranslationCheckpoint":
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        while True:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info(f"Waiting for another job using checkpoint '{self.directory}'.")
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            # `clear` removes the lock file before unlocking; retry if this one was removed meanwhile.
+            try:
+                if os.fstat(fd).st_ino == os.stat(self.lock_path).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+        self._lock_fd = fd
+        os.makedirs(self.pages_dir, exist_ok=True)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _write_json(self, path: str, data):
+        tmp_path = f"{path}.tmp-{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load_pages(self) -> Dict[int, Dict[int, str]]:
+        """Translated block maps saved so far, by page number."""
+        pages = {}
+        for name in os.listdir(self.pages_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.pages_dir, name), encoding="utf-8") as f:
+                    pages[int(name[:-5])] = {int(block_idx): text for block_idx, text in json.load(f).items()}
+            except (ValueError, OSError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint page '{name}': {e}")
+        return pages
+
+    def save_page(self, page_num: int, translated_map: Dict[int, str]):
+        """Persists one page's translations. Safe to call from worker threads."""
+        self._write_json(os.path.join(self.pages_dir, f"{page_num}.json"), translated_map)
+
+    def open_output(self) -> fitz.Document:
+        """
+        Opens the partial output document and loads `applied`, the pages it already holds.
+
+        Starts from a copy of the input if there is no usable partial document.
+        """
+        self.applied = set()
+        if os.path.exists(self.applied_path) and os.path.exists(self.partial_path):
+            try:
+                with open(self.applied_path, encoding="utf-8") as f:
+                    self.applied = set(json.load(f))
+                return fitz.open(self.partial_path)
+            except Exception as e:
+                logger.warning(f"Discarding unreadable partial output in '{self.directory}': {e}")
+                self.applied = set()
+
+        shutil.copyfile(self.input_pdf_path, self.partial_path)
+        self._write_json(self.applied_path, [])
+        return fitz.open(self.partial_path)
+
+    def mark_applied(self, doc: fitz.Document, page_num: int) -> fitz.Document:
+        """
+        Appends an applied page to `partial.pdf` and records it.
+
+        Returns:
+            The document to keep working with. MuPDF writes a broken xref when
+            one handle saves incrementally twice, so the file is reopened after
+            every save.
+        """
+        with self._lock:
+            if not self.incremental:
+                return doc
+            try:
+                doc.saveIncr()
+            except Exception as e:
+                # e.g. encrypted or repaired inputs. Page maps are still checkpointed.
+                logger.warning(f"Incremental save of '{self.partial_path}' failed, only translations will be checkpointed: {e}")
+                self.incremental = False
+                return doc
+            doc.close()
+            self.applied.add(page_num)
+            self._write_json(self.applied_path, sorted(self.applied))
+            return fitz.open(self.partial_path)
+
+    def clear(self):
+        """Removes the checkpoint of a finished job. Call while holding the lock."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        try:
+            os.remove(self.lock_path)
+        except FileNotFoundError:
+            pass
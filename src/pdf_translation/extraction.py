@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+
+import fitz  # PyMuPDF
+
+from src.config import logger
+
+# Text and style only: image blocks would carry their binary data in the dict output.
+EXTRACT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+@dataclass
+class ExtractedPage:
+    # `{'id': block_idx, 'text': ...}` for every non-empty text block.
+    blocks: list
+    # `(block_idx, bbox, font_size, color_rgb, alpha, font_name)` per entry of `blocks`.
+    block_metadata_mapping: list
+    # Plain text of the whole page, used as neighbour context.
+    text: str
+
+
+def extract_page(page: fitz.Page) -> ExtractedPage:
+    """
+    Extracts the text blocks, their style and the plain text of a page in one `get_text` pass.
+    """
+    page_num = page.number
+    text_blocks_for_translation = []
+    block_metadata_mapping = []
+    page_lines = []
+
+    for block_idx, block in enumerate(page.get_text('dict', flags=EXTRACT_FLAGS)['blocks']):
+        if block.get('type') != 0:  # type 0 is a text block
+            continue
+        lines = block.get('lines', [])
+        block_text = "\n".join("".join(span['text'] for span in line['spans']) for line in lines)
+        page_lines.append(block_text)
+
+        text_content = block_text.strip()
+        if not text_content:
+            continue
+        text_blocks_for_translation.append({'id': block_idx, 'text': text_content})
+
+        # Font, size and color come from the first span of the first line.
+        try:
+            first_line_spans = lines[0]["spans"][0]
+            font_size = first_line_spans['size']
+            font_name = first_line_spans['font']
+            color_int = first_line_spans['color']
+            alpha = first_line_spans['alpha']
+
+            # Convert color integer to RGB tuple (0.0-1.0 range)
+            red = ((color_int >> 16) & 0xFF) / 255.0
+            green = ((color_int >> 8) & 0xFF) / 255.0
+            blue = (color_int & 0xFF) / 255.0
+            color_rgb = (red, green, blue)
+
+            block_metadata_mapping.append((block_idx, block['bbox'], font_size, color_rgb, alpha, font_name))
+        except (IndexError, KeyError):
+            logger.warning(f"Could not extract span info for block {block_idx} on page {page_num+1}. Skipping font/color preservation.")
+            block_metadata_mapping.append((block_idx, block['bbox'], 12, (0,0,0), 1, 'helv')) # Default if metadata extraction fails
+
+    return ExtractedPage(text_blocks_for_translation, block_metadata_mapping, "\n".join(page_lines) + "\n")
@@ -0,0 +1,212 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from src import config as project_config
+from src.config import PROCESSED_PDF, TRANSLATION_CHECKPOINT_DIR, TRANSLATION_JOB_TTL_SECONDS, TRANSLATION_JOB_WORKERS, UPLOAD_PDF, logger
+from src.pdf_tools.document_pool import document_pool
+from src.pdf_tools.utils import file_sha256
+
+from .checkpoint import checkpoint_directory
+from .pdf_translator import translate_pdf
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+@dataclass
+class TranslationJob:
+    job_id: str
+    target_language: str
+    input_pdf_path: str
+    output_pdf_path: str
+    session_id: Optional[str] = None
+    # sha256 of the submitted document, so a new upload to the same path is a new job.
+    file_hash: Optional[str] = None
+    status: str = QUEUED
+    pages_done: int = 0
+    total_pages: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    # Incrementally saved output while the job runs, if checkpointing is enabled.
+    partial_pdf_path: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    # Recent `(timestamp, pages_done)` samples. A sliding window keeps pages restored
+    # from a checkpoint at the start of a run from skewing the rate for long.
+    _samples: deque = field(default_factory=lambda: deque(maxlen=20), repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def progress(self) -> float:
+        return self.pages_done / self.total_pages if self.total_pages else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Remaining time extrapolated from the recent page rate, or None until there is one."""
+        if self.finished or len(self._samples) < 2:
+            return None
+        (first_time, first_done), (last_time, last_done) = self._samples[0], self._samples[-1]
+        if last_done <= first_done:
+            return None
+        seconds_per_page = (last_time - first_time) / (last_done - first_done)
+        return seconds_per_page * (self.total_pages - self.pages_done)
+
+    def record_progress(self, pages_done: int, total_pages: int):
+        self.pages_done, self.total_pages = pages_done, total_pages
+        self._samples.append((time.time(), pages_done))
+
+    def snapshot(self) -> dict:
+        """JSON-friendly job state, as returned by the agent tool."""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "target_language": self.target_language,
+            "pages_done": self.pages_done,
+            "total_pages": self.total_pages,
+            "eta_seconds": None if self.eta_seconds is None else round(self.eta_seconds),
+            "error": self.error,
+        }
+
+
+class TranslationJobManager:
+    """
+    Runs `translate_pdf` jobs on a worker pool, off the Streamlit script thread.
+
+    The input is copied when a job is submitted, so later uploads to the same
+    path do not change a running job. Submitting the same document content,
+    language and output again while a job is unfinished returns the existing
+    job. Finished jobs are forgotten `job_ttl` seconds after they end.
+    """
+
+    def __init__(self, max_workers: int, checkpoint_dir: str = TRANSLATION_CHECKPOINT_DIR, job_ttl: float = TRANSLATION_JOB_TTL_SECONDS):
+        self.checkpoint_dir = checkpoint_dir
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="translation-job")
+        self._jobs: Dict[str, TranslationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, target_language: str, input_pdf_path: str, output_pdf_path: str, session_id: Optional[str] = None) -> TranslationJob:
+        file_hash = file_sha256(input_pdf_path)
+        with self._lock:
+            self._prune()
+            for job in self._jobs.values():
+                if (
+                    not job.finished
+                    and job.file_hash == file_hash
+                    and job.session_id == session_id
+                    and job.target_language == target_language
+                    and job.output_pdf_path == output_pdf_path
+                ):
+                    logger.info(f"Translation job {job.job_id} is already {job.status}.")
+                    return job
+
+            fd, snapshot_path = tempfile.mkstemp(suffix=".pdf", prefix="translation-job-")
+            os.close(fd)
+            shutil.copyfile(input_pdf_path, snapshot_path)
+            with document_pool.open(snapshot_path) as document:
+                total_pages = document.page_count
+
+            job = TranslationJob(
+                job_id=uuid.uuid4().hex[:12],
+                target_language=target_language,
+                input_pdf_path=snapshot_path,
+                output_pdf_path=output_pdf_path,
+                session_id=session_id,
+                file_hash=file_hash,
+                total_pages=total_pages,
+            )
+            if self.checkpoint_dir:
+                job.partial_pdf_path = os.path.join(checkpoint_directory(self.checkpoint_dir, snapshot_path, target_language), "partial.pdf")
+            self._jobs[job.job_id] = job
+
+        logger.info(f"Queued translation job {job.job_id}: '{input_pdf_path}' to '{target_language}'.")
+        self._executor.submit(self._run, job)
+        return job
+
+    def _prune(self):
+        # Called with `_lock` held.
+        expired = time.time() - self.job_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < expired]:
+            del self._jobs[job_id]
+
+    def _run(self, job: TranslationJob):
+        job.started_at = time.time()
+        try:
+            if job.cancel_event.is_set():
+                # Cancelled while queued.
+                job.status = CANCELLED
+                return
+
+            job.status = RUNNING
+            job.record_progress(0, job.total_pages)
+            saved = translate_pdf(
+                job.target_language,
+                job.input_pdf_path,
+                job.output_pdf_path,
+                checkpoint_dir=self.checkpoint_dir,
+                progress=job.record_progress,
+                cancel_event=job.cancel_event,
+            )
+            if saved:
+                # A cancel that came after the last page was translated is ignored.
+                job.status = DONE
+            elif job.cancel_event.is_set():
+                job.status = CANCELLED
+            else:
+                job.status, job.error = FAILED, "The translated PDF could not be saved."
+        except Exception as e:
+            logger.error(f"Translation job {job.job_id} failed: {e}")
+            job.status, job.error = FAILED, str(e)
+        finally:
+            job.finished_at = time.time()
+            try:
+                os.remove(job.input_pdf_path)
+            except OSError:
+                pass
+            logger.info(f"Translation job {job.job_id} {job.status} after {job.finished_at - job.started_at:.1f}s.")
+
+    def get(self, job_id: str) -> Optional[TranslationJob]:
+        return self._jobs.get(job_id)
+
+    def latest(self, session_id: Optional[str] = None) -> Optional[TranslationJob]:
+        """The most recently submitted job of a session."""
+        jobs = [job for job in list(self._jobs.values()) if job.session_id == session_id]
+        return max(jobs, key=lambda job: job.created_at) if jobs else None
+
+    def cancel(self, job_id: str) -> bool:
+        """Requests cancellation. The job stops after its in-flight requests finish."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_event.set()
+        logger.info(f"Cancellation requested for translation job {job_id}.")
+        return True
+
+
+job_manager = TranslationJobManager(TRANSLATION_JOB_WORKERS)
+
+
+def translate_pdf_tool(target_language: str):
+    """
+    Starts translating the uploaded PDF in the background.
+
+    Args:
+        target_language: The language to translate the PDF into.
+
+    Returns:
+        The job's state: `job_id`, `status`, `pages_done`, `total_pages` and `eta_seconds`.
+    """
+    job = job_manager.submit(target_language, UPLOAD_PDF, PROCESSED_PDF, session_id=project_config.session_id)
+    return job.snapshot()
+
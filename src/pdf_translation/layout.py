@@ -0,0 +1,172 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import fitz  # PyMuPDF
+
+# Slack kept between measured and available height, for rounding differences
+# between `fitz.Font` metrics and the widths `insert_textbox` uses.
+HEIGHT_SLACK = 0.98
+
+
+@dataclass
+class FitResult:
+    rect: fitz.Rect
+    fontsize: float
+    # False if the text does not fit even at the minimum font size.
+    fits: bool
+
+
+class TextMeasurer:
+    """
+    Measures wrapped text height offline, mirroring `Shape.insert_textbox`.
+
+    Text is wrapped the same way `insert_textbox` does it: lines are split on
+    spaces, words are placed greedily and words longer than a line are broken
+    per character. Widths scale linearly with the font size, so every word is
+    measured once at size 1 and reused for all sizes tried by `fit_text`.
+    """
+
+    def __init__(self, font: fitz.Font):
+        self.font = font
+        height = font.ascender - font.descender
+        self.line_height = height if height > 1 else 1.2
+        self.descender = font.descender
+        self.space_width = font.text_length(" ", fontsize=1)
+        self._widths: Dict[str, float] = {}
+
+    def width(self, text: str) -> float:
+        """Width of `text` at font size 1."""
+        width = self._widths.get(text)
+        if width is None:
+            width = self._widths[text] = self.font.text_length(text, fontsize=1)
+        return width
+
+    def prepare(self, text: str) -> List[List[tuple]]:
+        """Splits text into lines of `(word, unit_width)` pairs, for `count_lines`."""
+        return [[(word, self.width(word)) for word in line.expandtabs(1).split(" ")] for line in text.splitlines()]
+
+    def count_lines(self, prepared: List[List[tuple]], max_width: float) -> int:
+        """
+        Number of output lines when `prepared` text is wrapped to `max_width`, in units of the font size.
+        """
+        count = 0
+        for words in prepared:
+            lines = 0
+            rest = max_width
+            has_content = False
+            for word, word_width in words:
+                if rest >= word_width:
+                    rest -= word_width + self.space_width
+                    has_content = True
+                    continue
+                if has_content:
+                    lines += 1
+                if word_width <= max_width:
+                    rest = max_width - word_width - self.space_width
+                    has_content = True
+                    continue
+                # Long word: broken into as many full lines as needed.
+                used = 0.0
+                for char in word:
+                    char_width = self.width(char)
+                    if used <= max_width - char_width:
+                        used += char_width
+                    else:
+                        lines += 1
+                        used = char_width
+                rest = max_width - used - self.space_width
+                has_content = True
+            count += lines + (1 if has_content or not words else 0)
+        return max(count, 1)
+
+    def text_height(self, prepared: List[List[tuple]], fontsize: float, width: float) -> float:
+        lines = self.count_lines(prepared, width / fontsize)
+        return fontsize * (self.line_height * lines - self.descender)
+
+
+def fit_text(
+    measurer: TextMeasurer,
+    text: str,
+    rect: fitz.Rect,
+    max_fontsize: float,
+    max_rect: Optional[fitz.Rect] = None,
+    min_fontsize: float = 5,
+    precision: float = 0.25,
+) -> FitResult:
+    """
+    Finds the largest font size at which `text` fits, without touching the page.
+
+    The text is kept in `rect` at its original size when it fits. Otherwise it
+    may use `max_rect` (the block grown into free page space), and the font
+    size is binary searched between `min_fontsize` and `max_fontsize`.
+
+    Args:
+        measurer: Measurer for the font the text will be inserted with.
+        text: The text to place.
+        rect: The original block rectangle.
+        max_fontsize: The original font size, never exceeded.
+        max_rect: The largest rectangle the block may grow into. Defaults to `rect`.
+        min_fontsize: Smallest acceptable font size.
+        precision: Font size resolution of the search.
+
+    Returns:
+        The rectangle and font size to insert with.
+    """
+    prepared = measurer.prepare(text)
+
+    def fits(box: fitz.Rect, size: float) -> bool:
+        return measurer.text_height(prepared, size, box.width) <= box.height * HEIGHT_SLACK
+
+    if fits(rect, max_fontsize):
+        return FitResult(fitz.Rect(rect), max_fontsize, True)
+
+    box = fitz.Rect(max_rect) if max_rect is not None else fitz.Rect(rect)
+    if fits(box, max_fontsize):
+        return FitResult(box, max_fontsize, True)
+    if not fits(box, min_fontsize):
+        return FitResult(box, min_fontsize, False)
+
+    low, high = min_fontsize, max_fontsize
+    while high - low > precision:
+        middle = (low + high) / 2
+        if fits(box, middle):
+            low = middle
+        else:
+            high = middle
+    return FitResult(box, low, True)
+
+
+def growth_rects(rects: Sequence[fitz.Rect], page_rect: fitz.Rect, margin: float = 18, gap: float = 2) -> List[fitz.Rect]:
+    """
+    Largest rectangle each block may grow into without overlapping another block.
+
+    Blocks grow right and down: to the page margin, or to just before the
+    nearest block in the way.
+
+    Args:
+        rects: Block rectangles on the page.
+        page_rect: The page rectangle.
+        margin: Distance kept from the page edges.
+        gap: Distance kept from neighbouring blocks.
+
+    Returns:
+        One rectangle per block, each containing the original block rectangle.
+    """
+    grown = []
+    for i, rect in enumerate(rects):
+        x1 = max(rect.x1, page_rect.x1 - margin)
+        y1 = max(rect.y1, page_rect.y1 - margin)
+        for j, other in enumerate(rects):
+            if i == j:
+                continue
+            # Blocks to the right that share vertical extent limit the width.
+            if other.x0 >= rect.x1 and other.y0 < rect.y1 and other.y1 > rect.y0:
+                x1 = min(x1, max(rect.x1, other.x0 - gap))
+        for j, other in enumerate(rects):
+            if i == j:
+                continue
+            # Blocks below that share horizontal extent (of the widened box) limit the height.
+            if other.y0 >= rect.y1 and other.x0 < x1 and other.x1 > rect.x0:
+                y1 = min(y1, max(rect.y1, other.y0 - gap))
+        grown.append(fitz.Rect(rect.x0, rect.y0, x1, y1))
+    return grown
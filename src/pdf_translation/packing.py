@@ -0,0 +1,130 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from src.agent.embeddings import estimate_tokens
+from src.config import logger
+
+
+@dataclass
+class PageWork:
+    """The translatable blocks of one page and its neighbour page context."""
+    page_num: int
+    blocks: List[dict]
+    block_metadata_mapping: list
+    previous_pages: List[str]
+    next_pages: List[str]
+    # Document-wide block ids, parallel to `blocks`.
+    global_ids: List[int] = field(default_factory=list)
+
+    @property
+    def tokens(self) -> int:
+        return sum(estimate_tokens(block['text']) for block in self.blocks)
+
+
+@dataclass
+class Pack:
+    """Consecutive pages translated with a single model request."""
+    pages: List[PageWork]
+
+    @property
+    def page_nums(self) -> List[int]:
+        return [page.page_num for page in self.pages]
+
+
+def pack_pages(pages: Iterable[PageWork], token_budget: int) -> Iterator[Pack]:
+    """
+    Groups consecutive pages into packs whose block text fits the token budget.
+
+    Every block gets a document-wide integer id, so blocks from different
+    pages can share one request. A page larger than the budget gets a pack of
+    its own, so a budget of 0 means one request per page.
+
+    Args:
+        pages: Pages in document order.
+        token_budget: Maximum estimated tokens of block text per pack.
+
+    Yields:
+        Packs in document order.
+    """
+    next_id = 0
+    current: List[PageWork] = []
+    current_tokens = 0
+    for page in pages:
+        page.global_ids = list(range(next_id, next_id + len(page.blocks)))
+        next_id += len(page.blocks)
+
+        tokens = page.tokens
+        if current and current_tokens + tokens > token_budget:
+            yield Pack(current)
+            current, current_tokens = [], 0
+        current.append(page)
+        current_tokens += tokens
+
+    if current:
+        yield Pack(current)
+
+
+def translate_pack(pack: Pack, target_language: str, translate: Callable, min_pages: int = 1) -> Dict[int, Dict[int, str]]:
+    """
+    Translates a pack with one request and splits the result back per page.
+
+    When the model returns malformed JSON (an empty result) or leaves blocks
+    out, the pages with missing blocks are translated again in two smaller
+    packs, recursively, down to single pages.
+
+    Args:
+        pack: The pages to translate.
+        target_language: The language to translate into.
+        translate: `translate_text`-compatible callable.
+        min_pages: Packs of this many pages or fewer are not split further.
+
+    Returns:
+        A mapping from page number to `{block_idx: translation}`.
+    """
+    blocks = []
+    owners = {}
+    for page in pack.pages:
+        for global_id, block in zip(page.global_ids, page.blocks):
+            blocks.append({'id': global_id, 'text': block['text']})
+            owners[global_id] = (page.page_num, block['id'])
+
+    try:
+        translated = translate(
+            blocks=blocks,
+            target_language=target_language,
+            previous_pages=pack.pages[0].previous_pages,
+            next_pages=pack.pages[-1].next_pages,
+        ) or {}
+    except Exception as e:
+        logger.error(f"Error translating pages {pack.page_nums}: {e}")
+        translated = {}
+
+    per_page: Dict[int, Dict[int, str]] = {page.page_num: {} for page in pack.pages}
+    for global_id, translation in translated.items():
+        owner = owners.get(_as_id(global_id))
+        if owner is not None and translation:
+            page_num, block_idx = owner
+            per_page[page_num][block_idx] = translation
+
+    incomplete = [page for page in pack.pages if len(per_page[page.page_num]) < len(page.blocks)]
+    if not incomplete or len(pack.pages) <= min_pages:
+        return per_page
+
+    logger.warning(
+        f"Pack of pages {pack.page_nums} came back incomplete "
+        f"({len(incomplete)} pages missing blocks). Retrying them in smaller packs."
+    )
+    middle = (len(incomplete) + 1) // 2
+    for half in (incomplete[:middle], incomplete[middle:]):
+        if half:
+            for page_num, translations in translate_pack(Pack(half), target_language, translate, min_pages).items():
+                per_page[page_num].update(translations)
+    return per_page
+
+
+def _as_id(value) -> Optional[int]:
+    """Models sometimes echo integer ids back as strings."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -1,161 +1,426 @@
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+
 import fitz  # PyMuPDF
 
+from src.agent.translation_memory import get_translation_memory
 from src.agent.translator import translate_text
-from src.config import UPLOAD_PDF, PROCESSED_PDF, logger
+from src.config import (
+    TRANSLATION_CHECKPOINT_DIR,
+    TRANSLATION_CONCURRENCY,
+    TRANSLATION_PACK_TOKENS,
+    TRANSLATION_SAVE_DEFLATE,
+    TRANSLATION_SAVE_GARBAGE,
+    TRANSLATION_SUBSET_FONTS,
+    logger,
+)
+from src.pdf_tools.parallel_extraction import map_pages
+
+from .extraction import ExtractedPage, extract_page
+from .layout import TextMeasurer, fit_text, growth_rects
+from .checkpoint import TranslationCheckpoint
+from .packing import Pack, PageWork, pack_pages, translate_pack
 
 FONT_NAME = 'NotoSans'
 FONT_PATH = '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc'
+MIN_FONT_SIZE = 5
 
-def translate_pdf(target_language: str, input_pdf_path: str, output_pdf_path: str):
-    """
-    Translates a PDF file to a target language and saves it using reportlab.
+def _window_page_work(extracted: Iterator[ExtractedPage], total_pages: int) -> Iterator[PageWork]:
     """
-    logger.info(f"Starting PDF translation for '{input_pdf_path}' to '{target_language}'...")
-    logger.debug(f"Input PDF: {input_pdf_path}, Output PDF: {output_pdf_path}")
+    Yields the pages with text to translate from extracted pages in page order.
 
-    doc = fitz.open(input_pdf_path)
-
-    for page_num, page in enumerate(doc):
-        logger.info(f"Processing page {page_num+1}/{len(doc)} for translation.")
-
-        previous_pages_content = []
-        if page_num > 0:
-            previous_pages_content.append(doc.load_page(page_num - 1).get_text()) # Adjusted to get actual previous page
-        
-        next_pages_content = []
-        if page_num < len(doc) - 1:
-            next_pages_content.append(doc.load_page(page_num + 1).get_text()) # Adjusted to get actual next page
-
-        # Get text blocks and their properties from the current page
-        raw_blocks_info = page.get_text('blocks')
-        raw_page_dict = page.get_text('dict')
-        
-        text_blocks_for_translation = []
-        block_metadata_mapping = []
-
-        for block_idx, block_data in enumerate(raw_blocks_info):
-            if block_data[6] == 0:  # Assuming type 0 is text block
-                text_content = block_data[4].strip()
-                if text_content:
-                    text_blocks_for_translation.append({'id': block_idx, 'text': text_content})
-                    
-                    # Extract font, size, and color information from the first span of the first line
-                    # This relies on the structure of PyMuPDF's 'dict' output for text analysis
-                    # More robust parsing might be needed for complex PDFs
-                    try:
-                        first_line_spans = raw_page_dict['blocks'][block_idx]["lines"][0]["spans"][0]
-                        font_size = first_line_spans['size']
-                        font_name = first_line_spans['font']
-                        color_int = first_line_spans['color']
-                        alpha = first_line_spans['alpha']
-
-                        # Convert color integer to RGB tuple (0.0-1.0 range)
-                        red = ((color_int >> 16) & 0xFF) / 255.0
-                        green = ((color_int >> 8) & 0xFF) / 255.0
-                        blue = (color_int & 0xFF) / 255.0
-                        color_rgb = (red, green, blue)
-                        
-                        block_metadata_mapping.append((block_idx, block_data, font_size, color_rgb, alpha, font_name))
-                    except IndexError:
-                        logger.warning(f"Could not extract span info for block {block_idx} on page {page_num+1}. Skipping font/color preservation.")
-                        block_metadata_mapping.append((block_idx, block_data, 12, (0,0,0), 1, 'helv')) # Default if metadata extraction fails
-
-        if not text_blocks_for_translation:
+    A sliding window of three extracted pages provides the previous and next
+    page text, so neighbour context never triggers another extraction.
+    """
+    previous = None
+    current = next(extracted, None)
+    page_num = 0
+    while current is not None:
+        following = next(extracted, None)
+        logger.info(f"Processing page {page_num+1}/{total_pages} for translation.")
+        if current.blocks:
+            yield PageWork(
+                page_num,
+                current.blocks,
+                current.block_metadata_mapping,
+                [previous.text] if previous else [],
+                [following.text] if following else [],
+            )
+        else:
             logger.debug(f"No translatable text blocks found on page {page_num+1}. Skipping translation for this page.")
+        previous, current = current, following
+        page_num += 1
+
+
+_output_fonts = {}
+
+
+def _load_output_font():
+    """
+    Loads the output font once per process.
+
+    Returns:
+        A `(font_buffer, measurer)` tuple. `font_buffer` is None for base-14 fonts.
+    """
+    key = (FONT_NAME, FONT_PATH)
+    if key not in _output_fonts:
+        if FONT_PATH:
+            with open(FONT_PATH, "rb") as f:
+                buffer = f.read()
+            font = fitz.Font(fontbuffer=buffer)
+        else:
+            buffer, font = None, fitz.Font(FONT_NAME)
+        _output_fonts[key] = (buffer, TextMeasurer(font))
+    return _output_fonts[key]
+
+
+def _output_font_xref(page: fitz.Page) -> int:
+    """The xref of the output font in a page's resources, or 0 if the page has none."""
+    for xref, _, _, _, refname, *_ in page.get_fonts():
+        if refname == FONT_NAME:
+            return xref
+    return 0
+
+
+def _link_font(page: fitz.Page, font_xref: int):
+    """Adds an already embedded font to a page's resources under `FONT_NAME`."""
+    doc = page.parent
+    if doc.xref_get_key(page.xref, "Resources")[0] == "null":
+        # Resources inherited from the page tree are copied to the page first, like MuPDF does on writes.
+        xref = page.xref
+        while True:
+            kind, parent = doc.xref_get_key(xref, "Parent")
+            if kind != "xref":
+                break
+            xref = int(parent.split()[0])
+            kind, resources = doc.xref_get_key(xref, "Resources")
+            if kind != "null":
+                doc.xref_set_key(page.xref, "Resources", resources)
+                break
+    doc.xref_set_key(page.xref, f"Resources/Font/{FONT_NAME}", f"{font_xref} 0 R")
+
+
+def _register_font(page: fitz.Page, font_xref: int = 0) -> int:
+    """
+    Adds the output font to a page's resources, so text boxes can refer to it by name.
+
+    MuPDF embeds an identical font buffer only once per document handle, so
+    every page shares one font object. A reopened handle has lost that record
+    and would embed the font again; passing `font_xref`, the output font
+    already embedded in the document, links it to the page instead.
+
+    Returns:
+        The xref of the output font, to pass for later pages.
+    """
+    buffer, _ = _load_output_font()
+    if buffer is None:
+        return page.insert_font(fontname=FONT_NAME)
+    if font_xref and not _output_font_xref(page):
+        _link_font(page, font_xref)
+    return page.insert_font(fontname=FONT_NAME, fontbuffer=buffer)
+
+
+def save_translated_pdf(
+    doc: fitz.Document,
+    output_pdf_path: str,
+    subset_fonts: bool | None = None,
+    garbage: int | None = None,
+    deflate: bool | None = None,
+):
+    """
+    Saves a translated document, shrinking it on the way.
+
+    Args:
+        doc: The document to save.
+        output_pdf_path: Where to write it.
+        subset_fonts: Keep only the glyphs that are used in embedded fonts.
+            Defaults to `TRANSLATION_SUBSET_FONTS`.
+        garbage: PyMuPDF garbage collection level (0-4); 3 and up also merge
+            duplicate objects. Defaults to `TRANSLATION_SAVE_GARBAGE`.
+        deflate: Compress uncompressed streams. Defaults to `TRANSLATION_SAVE_DEFLATE`.
+    """
+    subset_fonts = TRANSLATION_SUBSET_FONTS if subset_fonts is None else subset_fonts
+    garbage = TRANSLATION_SAVE_GARBAGE if garbage is None else garbage
+    deflate = TRANSLATION_SAVE_DEFLATE if deflate is None else deflate
+
+    start = time.perf_counter()
+    if subset_fonts:
+        try:
+            doc.subset_fonts()
+        except Exception as e:
+            logger.warning(f"Font subsetting failed, saving full fonts: {e}")
+    subset_seconds = time.perf_counter() - start
+
+    doc.save(output_pdf_path, garbage=garbage, deflate=deflate, deflate_images=deflate, deflate_fonts=deflate)
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Saved '{output_pdf_path}': {os.path.getsize(output_pdf_path) / 2**20:.2f} MB in {elapsed:.2f}s "
+        f"(subset fonts: {subset_fonts} {subset_seconds:.2f}s, garbage: {garbage}, deflate: {deflate})."
+    )
+
+
+def _apply_translations(page: fitz.Page, page_num: int, block_metadata_mapping, translated_map, font_xref: int = 0) -> int:
+    """
+    Replaces the original text of a page with its translated blocks.
+
+    The font size and box of each block are solved offline with `fit_text`,
+    so every block is inserted once.
+
+    Must only be called from the thread that owns the document being written.
+
+    Returns:
+        The xref of the output font, see `_register_font`.
+    """
+    # Redact original text before inserting translated text
+    try:
+        page.add_redact_annot(page.rect)
+        page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE, graphics=fitz.PDF_REDACT_IMAGE_NONE)
+        logger.debug(f"Original text redacted on page {page_num+1}.")
+    except Exception as e:
+        logger.error(f"Error redacting text on page {page_num+1}: {e}")
+
+    _, measurer = _load_output_font()
+    font_xref = _register_font(page, font_xref)
+    block_rects = [fitz.Rect(bbox) for _, bbox, *_ in block_metadata_mapping]
+    max_rects = growth_rects(block_rects, page.rect)
+
+    for (block_idx, bbox, font_size, color_rgb, alpha, font_name), rect, max_rect in zip(
+        block_metadata_mapping, block_rects, max_rects
+    ):
+        translated_text = translated_map.get(block_idx)
+        if not translated_text:
             continue
 
-        logger.info(f"Translating {len(text_blocks_for_translation)} text blocks on page {page_num+1}.")
-        translated_map = translate_text(
-            blocks=text_blocks_for_translation,
-            target_language=target_language,
-            previous_pages=previous_pages_content,
-            next_pages=next_pages_content
+        fit = fit_text(measurer, translated_text, rect, font_size, max_rect=max_rect, min_fontsize=MIN_FONT_SIZE)
+        if not fit.fits:
+            logger.warning(f"Translated text for block {block_idx} on page {page_num+1} overflows even at {MIN_FONT_SIZE}pt. Text: '{translated_text[:50]}...'")
+
+        # TODO: Add RTL languages support, align need to be 2
+        try:
+            result = page.insert_textbox(
+                fit.rect,
+                translated_text,
+                fontname=FONT_NAME,
+                fontsize=fit.fontsize,
+                align=0, # Assuming left alignment for now
+                color=color_rgb,
+                fill_opacity=alpha,
+            )
+            if result < 0:
+                # Only reachable when the text overflows at the minimum size.
+                logger.warning(f"Could not fit translated text for block {block_idx} on page {page_num+1}. Text: '{translated_text[:50]}...'")
+            else:
+                logger.debug(f"Inserted translated text for block {block_idx} on page {page_num+1} at {fit.fontsize:.1f}pt.")
+        except Exception as insert_e:
+            logger.error(f"Error inserting textbox for block {block_idx} on page {page_num+1}: {insert_e}")
+
+    return font_xref
+
+
+def translate_pdf(
+    target_language: str,
+    input_pdf_path: str,
+    output_pdf_path: str,
+    max_workers: int | None = None,
+    pack_tokens: int | None = None,
+    checkpoint_dir: str | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    cancel_event: threading.Event | None = None,
+):
+    """
+    Translates a PDF file to a target language and saves it.
+
+    Consecutive pages are packed into one model request up to a token budget,
+    and packs are sent to the model concurrently by a bounded worker pool,
+    while all reads and writes of the PyMuPDF documents happen on the calling
+    thread. Translations are applied strictly in page order.
+
+    With checkpointing, every page's translations are persisted as they
+    arrive and the output is saved incrementally after every applied page,
+    so a job that dies is resumed from where it stopped by calling this
+    function again with the same input and language.
+
+    Args:
+        target_language: The language to translate the PDF into.
+        input_pdf_path: The path to the PDF file to translate.
+        output_pdf_path: The path where the translated PDF is saved.
+        max_workers: Maximum number of concurrent translation requests.
+            Defaults to `TRANSLATION_CONCURRENCY`.
+        pack_tokens: Estimated block-text tokens per request. 0 sends one
+            request per page. Defaults to `TRANSLATION_PACK_TOKENS`.
+        checkpoint_dir: Where job checkpoints are kept. "" disables
+            checkpointing. Defaults to `TRANSLATION_CHECKPOINT_DIR`.
+        progress: Called with `(pages_done, total_pages)` as pages are finished, in page order.
+        cancel_event: When set, no further requests are sent and the job stops
+            without saving the output. Translations received so far stay in the
+            checkpoint. Once every request has been sent, the translation
+            finishes and is saved regardless.
+
+    Returns:
+        True if the translated PDF was saved, False otherwise (including when cancelled).
+    """
+    max_workers = max(1, max_workers or TRANSLATION_CONCURRENCY)
+    pack_tokens = TRANSLATION_PACK_TOKENS if pack_tokens is None else pack_tokens
+    logger.info(f"Starting PDF translation for '{input_pdf_path}' to '{target_language}' with {max_workers} workers...")
+    logger.debug(f"Input PDF: {input_pdf_path}, Output PDF: {output_pdf_path}")
+
+    checkpoint_dir = TRANSLATION_CHECKPOINT_DIR if checkpoint_dir is None else checkpoint_dir
+    if not checkpoint_dir:
+        return _translate_pdf(target_language, input_pdf_path, output_pdf_path, max_workers, pack_tokens, None, progress, cancel_event)
+    with TranslationCheckpoint(checkpoint_dir, input_pdf_path, target_language) as checkpoint:
+        return _translate_pdf(target_language, input_pdf_path, output_pdf_path, max_workers, pack_tokens, checkpoint, progress, cancel_event)
+
+
+def _translate_pdf(
+    target_language: str,
+    input_pdf_path: str,
+    output_pdf_path: str,
+    max_workers: int,
+    pack_tokens: int,
+    checkpoint: TranslationCheckpoint | None,
+    progress: Callable[[int, int], None] | None,
+    cancel_event: threading.Event | None,
+):
+    """`translate_pdf` with the checkpoint, if any, already locked."""
+    # The input is only read from, `doc` is only written to. Keeping them apart means
+    # neighbour page context is never taken from an already translated page.
+    doc = checkpoint.open_output() if checkpoint else fitz.open(input_pdf_path)
+    total_pages = len(doc)
+
+    saved_pages = {}
+    if checkpoint:
+        saved_pages = checkpoint.load_pages()
+        if checkpoint.applied or saved_pages:
+            logger.info(
+                f"Resuming translation from '{checkpoint.directory}': {len(checkpoint.applied)} pages applied, "
+                f"{len(saved_pages)} pages translated."
+            )
+
+    def report(page_num: int):
+        if progress is not None:
+            progress(page_num + 1, total_pages)
+
+    # The output font embedded by earlier pages; `checkpoint.mark_applied` reopens `doc`.
+    font_xref = _output_font_xref(doc.load_page(min(checkpoint.applied))) if checkpoint and checkpoint.applied else 0
+
+    def apply_page(page: PageWork, translated_map):
+        nonlocal doc, font_xref
+        font_xref = _apply_translations(
+            doc.load_page(page.page_num), page.page_num, page.block_metadata_mapping, translated_map, font_xref
         )
-        if not translated_map:
-            logger.warning(f"No translations received for page {page_num+1}. Skipping further processing for this page.")
-            continue
-        
-        # Redact original text before inserting translated text
+        if checkpoint:
+            doc = checkpoint.mark_applied(doc, page.page_num)
+        logger.info(f"Applied translation of page {page.page_num+1}/{total_pages}.")
+        report(page.page_num)
+
+    def translate_and_save(pack: Pack):
+        translated_pages = translate_pack(pack, target_language, translate_text)
+        if checkpoint:
+            for page_num, translated_map in translated_pages.items():
+                if translated_map:
+                    checkpoint.save_page(page_num, translated_map)
+        return translated_pages
+
+    def pending_pages():
+        # Pages translated before a restart are applied from the checkpoint without a request.
+        # Large documents are extracted by worker processes, see `map_pages`.
+        for page in _window_page_work(map_pages(input_pdf_path, extract_page), total_pages):
+            if checkpoint and page.page_num in checkpoint.applied:
+                report(page.page_num)
+                continue
+            if page.page_num in saved_pages:
+                apply_page(page, saved_pages[page.page_num])
+                continue
+            yield page
+
+    # (pack, future) in page order
+    in_flight = deque()
+    request_count = 0
+
+    def apply_next():
+        pack, future = in_flight.popleft()
         try:
-            page.add_redact_annot(page.rect)
-            page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE, graphics=fitz.PDF_REDACT_IMAGE_NONE)
-            logger.debug(f"Original text redacted on page {page_num+1}.")
+            translated_pages = future.result()
         except Exception as e:
-            logger.error(f"Error redacting text on page {page_num+1}: {e}")
-
-        for block_idx, original_block_data, font_size, color_rgb, alpha, font_name in block_metadata_mapping:
-            translated_text = translated_map.get(block_idx)
-
-            if translated_text:
-                rect = fitz.Rect(original_block_data[:4])  # Extract x0, y0, x1, y1
-
-                # usable_font_name = get_or_register_font(doc, page, font_name, font_cache) # Use font from original, or register a default
-
-                adjusted_font_size = font_size
-                text_insert_successful = False
-                
-                # Try to insert text, adjusting size/box if necessary
-                for attempt in range(10): # Max 10 attempts to fit text
-                    try:
-                        # Attempt to insert textbox with current parameters
-                        # Align can be 0 (left), 1 (center), 2 (right)
-                        # TODO: Add RTL languages support, align need to be 2
-                        result = page.insert_textbox(
-                            rect,
-                            translated_text,
-                            fontname=FONT_NAME,
-                            fontfile=FONT_PATH,
-                            fontsize=adjusted_font_size,
-                            align=0, # Assuming left alignment for now
-                            color=color_rgb,
-                            fill_opacity=alpha,
-                        )
-
-                        if result >= 0: # Text fits
-                            text_insert_successful = True
-                            logger.debug(f"Successfully inserted translated text for block {block_idx} on page {page_num+1} (attempt {attempt+1}).")
-                            break
-                        else: # Text overflows (result < 0 indicates needed space)
-                            logger.debug(f"Text overflow for block {block_idx} on page {page_num+1}. Needed: {result}. Adjusting font size and rect.")
-                            # Adjust font size and/or rectangle to fit text
-                            adjusted_font_size *= 0.9 # Reduce font size
-                            
-                            # Expand the rectangle horizontally if possible, or vertically if needed
-                            # For simplicity, will just decrease font size and try to expand rect.
-                            
-                            # Simple rectangle expansion (example - could be more sophisticated)
-                            rect.x1 = min(rect.x1 - result, page.rect.x1) # Try to extend right boundary if space needed
-                            if adjusted_font_size < 5: # Don't go below a certain font size
-                                logger.warning(f"Font size for block {block_idx} on page {page_num+1} is too small. Stopping adjustments.")
-                                break
-
-                    except Exception as insert_e:
-                        logger.error(f"Error inserting textbox for block {block_idx} on page {page_num+1} (attempt {attempt+1}): {insert_e}")
-                        break # Stop trying for this block
-
-                if not text_insert_successful:
-                    logger.warning(f"Could not fit translated text for block {block_idx} on page {page_num+1} after multiple attempts. Text: '{translated_text[:50]}...'")
-    
-    
+            logger.error(f"Error translating pages {pack.page_nums}: {e}")
+            translated_pages = {}
+
+        for page in pack.pages:
+            translated_map = translated_pages.get(page.page_num)
+            if not translated_map:
+                logger.warning(f"No translations received for page {page.page_num+1}. Skipping further processing for this page.")
+                report(page.page_num)
+                continue
+
+            apply_page(page, translated_map)
+
+    pages = pending_pages()
+    # Set when a cancel leaves pages untranslated. A cancel that arrives once
+    # every request has been sent still finishes and saves the document.
+    stopped = False
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-translate") as executor:
+            for pack in pack_pages(pages, pack_tokens):
+                if cancel_event is not None and cancel_event.is_set():
+                    stopped = True
+                    break
+
+                block_count = sum(len(page.blocks) for page in pack.pages)
+                logger.info(f"Translating {block_count} text blocks on pages {[n + 1 for n in pack.page_nums]}.")
+                future = executor.submit(translate_and_save, pack)
+                in_flight.append((pack, future))
+                request_count += 1
+
+                # Apply finished packs as soon as they are at the head of the queue, and
+                # block once the window is full so extraction never runs too far ahead.
+                while in_flight and (in_flight[0][1].done() or len(in_flight) >= max_workers * 2):
+                    apply_next()
+
+            if cancel_event is not None and cancel_event.is_set():
+                # Queued requests are dropped; running ones finish, are checkpointed and applied.
+                for _, future in in_flight:
+                    stopped = future.cancel() or stopped
+                in_flight = deque(item for item in in_flight if not item[1].cancelled())
+
+            while in_flight:
+                apply_next()
+    finally:
+        # Stops extraction still in progress, e.g. after a cancel.
+        pages.close()
+
+    logger.info(f"Sent {request_count} translation packs for {total_pages} pages.")
+
+    if stopped:
+        logger.info(f"Translation of '{input_pdf_path}' cancelled.")
+        doc.close()
+        return False
+
+    report(total_pages - 1)
+
+    memory = get_translation_memory()
+    if memory is not None:
+        logger.info(f"Translation memory stats: {memory.stats()}")
+
     logger.info("Finished processing all pages. Saving translated PDF.")
     os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
 
     try:
-        doc.save(output_pdf_path)
+        save_translated_pdf(doc, output_pdf_path)
         logger.info(f"Translated PDF saved to '{output_pdf_path}' successfully.")
-        return True
     except Exception as e:
         logger.error(f"Error saving translated PDF to '{output_pdf_path}': {e}")
         return False
+    finally:
+        doc.close()
 
+    if checkpoint:
+        checkpoint.clear()
+    return True
 
-def translate_pdf_tool(target_language: str):
-    return translate_pdf(
-        target_language=target_language,
-        input_pdf_path=UPLOAD_PDF,
-        output_pdf_path=PROCESSED_PDF
-    )
 
 if __name__ == '__main__':
     from dotenv import load_dotenv
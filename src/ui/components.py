@@ -1,38 +1,112 @@
+import os
 import time
 import streamlit as st
-import base64
-import fitz # PyMuPDF
-from io import BytesIO
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-def display_pdf(pdf_path: str):
+from src.config import PDF_VIEW_DPI, TRANSLATION_POLL_SECONDS
+from src.pdf_translation.jobs import DONE, job_manager
+from src.ui.page_images import is_repaired, page_count, render_page
+
+def _page_selector(total_pages: int, key: str) -> int:
+    """
+    Renders a page number input and returns the selected zero-based page.
+    """
+    page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=max(total_pages, 1), step=1, key=key)
+    return int(page) - 1
+
+
+def display_pdf(pdf_path: str, key: str = "pdf_page", page_num: Optional[int] = None):
+    """
+    Displays one page of a PDF file as an image in the Streamlit app.
+
+    Only the shown page is rendered, and rendered pages are cached, so a rerun
+    costs the same however long the document is.
+
+    Args:
+        pdf_path: The PDF to display.
+        key: Widget key of the page selector.
+        page_num: Zero-based page to show. Without it, a page selector is shown.
+    """
+    total_pages = page_count(pdf_path)
+    if total_pages == 0:
+        return
+    if page_num is None:
+        page_num = _page_selector(total_pages, key)
+    st.image(render_page(pdf_path, min(page_num, total_pages - 1), PDF_VIEW_DPI), width="stretch")
+
+
+def _display_partial_pdf(job, page_num: int):
     """
-    Displays a PDF file in the Streamlit app.
+    Shows a page of a running job's partial output, if there is one yet.
+
+    The file is appended to while the job runs, so a copy that MuPDF has to
+    repair was caught mid-write and is skipped until the next poll.
     """
-    with open(pdf_path, "rb") as f:
-        base64_pdf = base64.b64encode(f.read()).decode("utf-8")
-    pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="700" height="1000" type="application/pdf"></iframe>'
-    st.markdown(pdf_display, unsafe_allow_html=True)
+    if not job.partial_pdf_path or not os.path.exists(job.partial_pdf_path):
+        return
+    try:
+        if not is_repaired(job.partial_pdf_path):
+            display_pdf(job.partial_pdf_path, page_num=page_num)
+    except Exception:
+        pass
+
+
+def _render_translation_job(job_id: str, translated_pdf_path: str, page_num: int):
+    job = job_manager.get(job_id)
+    if job is None:
+        display_pdf(translated_pdf_path, page_num=page_num)
+        return
+
+    if job.status == DONE:
+        if st.session_state.get(f"job_{job_id}_rendered_running"):
+            # Switches this message from polling to the static view.
+            st.session_state[f"job_{job_id}_rendered_running"] = False
+            st.rerun()
+        display_pdf(translated_pdf_path, page_num=page_num)
+        return
+    if job.finished:
+        st.warning(f"Translation {job.status}." + (f" {job.error}" if job.error else ""))
+        return
+
+    st.session_state[f"job_{job_id}_rendered_running"] = True
+    eta = f", about {job.eta_seconds:.0f}s left" if job.eta_seconds is not None else ""
+    st.progress(job.progress, text=f"Translating to {job.target_language}: page {job.pages_done}/{job.total_pages}{eta}")
+    if st.button("Cancel translation", key=f"cancel_{job_id}"):
+        job_manager.cancel(job_id)
 
+    _display_partial_pdf(job, page_num)
 
-def display_pdf_translation(original_pdf_path: str, translated_pdf_path: str):
+
+def display_pdf_translation(original_pdf_path: str, translated_pdf_path: str, job_id: Optional[str] = None):
     """
-    Displays original and translated PDF files side-by-side.
+    Displays original and translated PDF files side-by-side, one page at a time.
+
+    Both sides share a page selector. With a `job_id`, the translated side
+    polls the background job, showing its progress and the pages translated
+    so far until it finishes.
     """
+    page_num = _page_selector(page_count(original_pdf_path), key="translation_page")
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("Original PDF")
-        display_pdf(original_pdf_path)
+        display_pdf(original_pdf_path, page_num=page_num)
     with col2:
         st.subheader("Translated PDF")
-        display_pdf(translated_pdf_path)
+        if job_id is None:
+            if os.path.exists(translated_pdf_path):
+                display_pdf(translated_pdf_path, page_num=page_num)
+            return
+
+        job = job_manager.get(job_id)
+        run_every = None if job is None or job.finished else TRANSLATION_POLL_SECONDS
+        st.fragment(run_every=run_every)(_render_translation_job)(job_id, translated_pdf_path, page_num)
 
 def display_pdf_qa(input_pdf_path: str):
     """
     Displays the original PDF for Q&A reference.
     """
     st.subheader("Original PDF for Reference")
-    display_pdf(input_pdf_path)
+    display_pdf(input_pdf_path, key="qa_page")
 
 def render_quiz():
     """
@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from src.config import PAGE_IMAGE_CACHE_MB, logger
+from src.pdf_tools.document_pool import document_pool
+from src.pdf_tools.utils import file_sha256
+
+
+class PageImageCache:
+    """
+    LRU of rendered page PNGs keyed by `(file hash, page number, dpi)`, bounded by total bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, int, int], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, int, int]):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: Tuple[str, int, int], data: bytes):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def discard(self, file_hash: str):
+        """Drops every rendered page of one file version."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == file_hash]:
+                self.size -= len(self._entries.pop(key))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+page_image_cache = PageImageCache(PAGE_IMAGE_CACHE_MB * 2**20)
+
+# Content hash last rendered for each path. Pages of a file's previous version
+# (e.g. a job's partial output before its latest page) are dropped from the cache.
+_rendered_hashes: Dict[str, str] = {}
+_rendered_hashes_lock = threading.Lock()
+
+
+def _file_version(pdf_path: str) -> str:
+    file_hash = file_sha256(pdf_path)
+    with _rendered_hashes_lock:
+        previous = _rendered_hashes.get(pdf_path)
+        _rendered_hashes[pdf_path] = file_hash
+        stale = previous is not None and previous != file_hash and previous not in _rendered_hashes.values()
+    if stale:
+        page_image_cache.discard(previous)
+    return file_hash
+
+
+def page_count(pdf_path: str) -> int:
+    with document_pool.open(pdf_path) as document:
+        return document.page_count
+
+
+def is_repaired(pdf_path: str) -> bool:
+    """Whether MuPDF had to repair the file, e.g. because it was read while being appended to."""
+    with document_pool.open(pdf_path) as document:
+        return document.document.is_repaired
+
+
+def render_page(pdf_path: str, page_num: int, dpi: int) -> bytes:
+    """
+    Renders one page as PNG, serving repeated requests from `page_image_cache`.
+
+    Args:
+        pdf_path: The PDF to render from.
+        page_num: Zero-based page number.
+        dpi: Render resolution.
+
+    Returns:
+        The PNG bytes of the page.
+    """
+    key = (_file_version(os.path.abspath(pdf_path)), page_num, dpi)
+    data = page_image_cache.get(key)
+    if data is None:
+        with document_pool.open(pdf_path) as document, document.lock:
+            data = document.document.load_page(page_num).get_pixmap(dpi=dpi).tobytes("png")
+        page_image_cache.put(key, data)
+        logger.debug(f"Rendered page {page_num+1} of '{pdf_path}' at {dpi} dpi ({len(data) / 1024:.0f} KB).")
+    return data
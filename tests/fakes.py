@@ -0,0 +1,28 @@
+import asyncio
+
+
+class RateLimitError(Exception):
+    code = 429
+
+
+def fake_model(capacity: int, latency: float, retry_after: float):
+    """
+    Async stand-in for the translator model.
+
+    Accepts at most `capacity` concurrent requests and answers anything
+    beyond that with a 429 carrying a retry hint, like the Gemini API does.
+    """
+    in_flight = 0
+
+    async def generate(prompt: str) -> str:
+        nonlocal in_flight
+        if in_flight >= capacity:
+            raise RateLimitError(f"429 Resource has been exhausted. Please retry in {retry_after}s.")
+        in_flight += 1
+        try:
+            await asyncio.sleep(latency)
+            return prompt.upper()
+        finally:
+            in_flight -= 1
+
+    return generate
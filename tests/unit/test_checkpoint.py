@@ -0,0 +1,38 @@
+import os
+import threading
+
+import fitz
+
+from src.pdf_translation.checkpoint import TranslationCheckpoint
+
+
+def write_pdf(path):
+    document = fitz.open()
+    document.new_page().insert_text((72, 72), "checkpoint")
+    document.save(path)
+    document.close()
+
+
+def test_second_writer_waits_for_first_to_clear(tmp_path):
+    input_pdf = str(tmp_path / "input.pdf")
+    write_pdf(input_pdf)
+    root = str(tmp_path / "jobs")
+    entered = threading.Event()
+    events = []
+
+    def second_job():
+        with TranslationCheckpoint(root, input_pdf, "German") as checkpoint:
+            entered.set()
+            events.append(("second", os.path.isdir(checkpoint.pages_dir)))
+
+    with TranslationCheckpoint(root, input_pdf, "German") as first:
+        first.open_output().close()
+        thread = threading.Thread(target=second_job)
+        thread.start()
+        assert not entered.wait(0.2)
+        events.append(("first", None))
+        first.clear()
+    thread.join(5)
+
+    # The second job starts only after the first has cleared, with a fresh directory.
+    assert events == [("first", None), ("second", True)]
@@ -0,0 +1,178 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src import config as project_config
+from src.agent import embeddings
+
+
+def fake_vector(text):
+    # "chunk-7" -> [7.0, 1.0], so tests can tell which input a vector belongs to.
+    return [float(text.rsplit("-", 1)[1]), 1.0]
+
+
+class EmbeddingServer:
+    """
+    Local stand-in for an OpenAI-compatible `/v1/embeddings` endpoint.
+
+    Records every request, answers with items in reverse order (relying on
+    `index` for ordering), and fails the first `fail_times` requests that
+    contain `fail_text` with HTTP 500.
+    """
+
+    def __init__(self, fail_text=None, fail_times=0, delay=None):
+        self.requests = []
+        self.fail_text = fail_text
+        self.fail_times = fail_times
+        self.delay = delay
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    server.requests.append(payload)
+                    fail = server.fail_text in payload["input"] and server.fail_times > 0
+                    if fail:
+                        server.fail_times -= 1
+                if server.delay:
+                    time.sleep(server.delay(payload["input"]))
+                if fail:
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                data = [{"index": i, "embedding": fake_vector(text)} for i, text in enumerate(payload["input"])]
+                body = json.dumps({"data": data[::-1]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/embeddings"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def self_hosted(monkeypatch):
+    """Points the embedder at a local server, with the disk cache off and no retry delays."""
+    monkeypatch.setattr(project_config, "EMBEDDING_CACHE_DIR", "")
+    monkeypatch.setattr(project_config, "EMBEDDING_DIM", 0)
+    monkeypatch.setattr(project_config, "EMBEDDING_BATCH_SIZE", 10)
+    monkeypatch.setattr(project_config, "EMBEDDING_BATCH_TOKENS", 10_000)
+    monkeypatch.setattr(project_config, "EMBEDDING_CONCURRENCY", 4)
+    monkeypatch.setattr(project_config, "EMBEDDING_MAX_RETRIES", 3)
+    monkeypatch.setattr(project_config, "SELFHOSTED_EMBEDDING_MODEL", "test-embedder")
+    monkeypatch.setattr(embeddings.time, "sleep", lambda seconds: None)
+
+    def start(**server_options):
+        server = EmbeddingServer(**server_options)
+        monkeypatch.setattr(project_config, "EMBEDDING_URL", server.url)
+        return server
+
+    return start
+
+
+def make_chunks(count):
+    return [f"chunk-{i}" for i in range(count)]
+
+
+def test_make_batches_respects_item_and_token_limits():
+    chunks = ["a" * 40] * 7  # 11 estimated tokens each
+    assert embeddings.make_batches(chunks, max_items=3, max_tokens=1000) == [(0, 3), (3, 6), (6, 7)]
+    assert embeddings.make_batches(chunks, max_items=100, max_tokens=25) == [(0, 2), (2, 4), (4, 6), (6, 7)]
+
+
+def test_make_batches_gives_an_oversized_chunk_its_own_batch():
+    chunks = ["short", "x" * 400, "short"]
+    assert embeddings.make_batches(chunks, max_items=10, max_tokens=20) == [(0, 1), (1, 2), (2, 3)]
+
+
+def test_self_hosted_requests_are_batched(self_hosted):
+    with self_hosted() as server:
+        result = embeddings.generate_embeddings(make_chunks(25))
+
+    assert len(server.requests) == 3
+    assert sorted(len(request["input"]) for request in server.requests) == [5, 10, 10]
+    assert all(request["model"] == "test-embedder" for request in server.requests)
+    assert result == [fake_vector(chunk) for chunk in make_chunks(25)]
+
+
+def test_result_order_is_preserved_when_batches_finish_out_of_order(self_hosted):
+    # The first batch is the slowest, so batches complete in reverse order.
+    def delay(texts):
+        return 0.2 if "chunk-0" in texts else 0.0
+
+    with self_hosted(delay=delay) as server:
+        result = embeddings.generate_embeddings(make_chunks(40))
+
+    assert len(server.requests) == 4
+    assert result == [fake_vector(chunk) for chunk in make_chunks(40)]
+
+
+def test_only_the_failed_batch_is_retried(self_hosted):
+    with self_hosted(fail_text="chunk-12", fail_times=2) as server:
+        result = embeddings.generate_embeddings(make_chunks(30))
+
+    sent = [tuple(request["input"]) for request in server.requests]
+    assert len(sent) == 5
+    assert sent.count(tuple(make_chunks(30)[10:20])) == 3
+    assert sent.count(tuple(make_chunks(30)[0:10])) == 1
+    assert sent.count(tuple(make_chunks(30)[20:30])) == 1
+    assert result == [fake_vector(chunk) for chunk in make_chunks(30)]
+
+
+def test_a_batch_failing_every_retry_returns_no_embeddings(self_hosted):
+    with self_hosted(fail_text="chunk-3", fail_times=100) as server:
+        result = embeddings.generate_embeddings(make_chunks(20))
+
+    assert result == []
+    assert [tuple(request["input"]) for request in server.requests].count(tuple(make_chunks(20)[0:10])) == 3
+
+
+def test_gemini_backend_is_batched(monkeypatch):
+    monkeypatch.setattr(project_config, "EMBEDDING_URL", "")
+    monkeypatch.setattr(project_config, "EMBEDDING_CACHE_DIR", "")
+    monkeypatch.setattr(project_config, "EMBEDDING_DIM", 0)
+    monkeypatch.setattr(project_config, "EMBEDDING_BATCH_SIZE", 8)
+    calls = []
+
+    def embed_content(model, content, task_type):
+        calls.append(list(content))
+        return {"embedding": [fake_vector(text) for text in content]}
+
+    monkeypatch.setattr(embeddings.genai, "embed_content", embed_content)
+    result = embeddings.generate_embeddings(make_chunks(20))
+
+    assert sorted(len(call) for call in calls) == [4, 8, 8]
+    assert result == [fake_vector(chunk) for chunk in make_chunks(20)]
+
+
+def test_embed_query_embeds_the_original_query_and_normalizes_only_the_key(monkeypatch):
+    monkeypatch.setattr(embeddings, "query_cache", embeddings.QueryEmbeddingCache(16))
+    embedded = []
+
+    def generate(chunks, model, task_type):
+        embedded.extend(chunks)
+        return [[1.0, 0.0]]
+
+    monkeypatch.setattr(embeddings, "generate_embeddings", generate)
+    assert embeddings.embed_query("What is the  GDP of NATO?") == [1.0, 0.0]
+    assert embeddings.embed_query("what is the gdp of nato?") == [1.0, 0.0]
+    assert embedded == ["What is the  GDP of NATO?"]
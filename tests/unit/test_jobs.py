@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+
+import fitz
+import pytest
+
+from src.pdf_translation import jobs
+from src.pdf_translation.jobs import CANCELLED, DONE, TranslationJobManager
+
+
+def write_pdf(path, text):
+    document = fitz.open()
+    document.new_page().insert_text((72, 72), text)
+    document.save(path)
+    document.close()
+
+
+@pytest.fixture
+def blocking_translate(monkeypatch):
+    """Replaces `translate_pdf` with a stub that waits for `release` and then succeeds."""
+    release = threading.Event()
+    calls = []
+
+    def translate_pdf(target_language, input_pdf_path, output_pdf_path, **kwargs):
+        calls.append(input_pdf_path)
+        release.wait(5)
+        return True
+
+    monkeypatch.setattr(jobs, "translate_pdf", translate_pdf)
+    yield release, calls
+    release.set()
+
+
+@pytest.fixture
+def make_manager():
+    """Builds job managers and waits for their worker threads, so no job logs after its test."""
+    managers = []
+
+    def make(max_workers, **kwargs):
+        managers.append(TranslationJobManager(max_workers, checkpoint_dir=None, **kwargs))
+        return managers[-1]
+
+    yield make
+    for manager in managers:
+        manager._executor.shutdown(wait=True)
+
+
+def wait_finished(job):
+    deadline = time.time() + 5
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+def test_same_document_returns_running_job(tmp_path, blocking_translate, make_manager):
+    release, _ = blocking_translate
+    upload = str(tmp_path / "upload.pdf")
+    write_pdf(upload, "first")
+    manager = make_manager(1)
+    job = manager.submit("German", upload, str(tmp_path / "out.pdf"), session_id="s")
+    assert manager.submit("German", upload, str(tmp_path / "out.pdf"), session_id="s") is job
+    release.set()
+    wait_finished(job)
+    assert job.status == DONE
+
+
+def test_new_upload_to_same_path_is_a_new_job(tmp_path, blocking_translate, make_manager):
+    release, _ = blocking_translate
+    upload = str(tmp_path / "upload.pdf")
+    write_pdf(upload, "first")
+    manager = make_manager(2)
+    first = manager.submit("German", upload, str(tmp_path / "out.pdf"), session_id="s")
+    write_pdf(upload, "a different document")
+    second = manager.submit("German", upload, str(tmp_path / "out.pdf"), session_id="s")
+    assert second is not first
+    assert second.file_hash != first.file_hash
+    release.set()
+    wait_finished(first)
+    wait_finished(second)
+
+
+def test_job_cancelled_while_queued_removes_its_snapshot(tmp_path, blocking_translate, make_manager):
+    release, calls = blocking_translate
+    upload = str(tmp_path / "upload.pdf")
+    write_pdf(upload, "first")
+    manager = make_manager(1)
+    running = manager.submit("German", upload, str(tmp_path / "out.pdf"), session_id="a")
+    queued = manager.submit("German", upload, str(tmp_path / "out.pdf"), session_id="b")
+    assert manager.cancel(queued.job_id)
+    release.set()
+    # The snapshot is removed after the status is set; wait for the worker itself.
+    manager._executor.shutdown(wait=True)
+    assert queued.status == CANCELLED
+    assert queued.input_pdf_path not in calls
+    assert not os.path.exists(queued.input_pdf_path)
+
+
+def test_finished_jobs_expire(tmp_path, blocking_translate, make_manager):
+    release, _ = blocking_translate
+    release.set()
+    upload = str(tmp_path / "upload.pdf")
+    write_pdf(upload, "first")
+    manager = make_manager(1, job_ttl=0)
+    first = manager.submit("German", upload, str(tmp_path / "out.pdf"), session_id="s")
+    wait_finished(first)
+    manager.submit("French", upload, str(tmp_path / "out.pdf"), session_id="s")
+    assert manager.get(first.job_id) is None
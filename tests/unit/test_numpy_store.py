@@ -0,0 +1,74 @@
+import numpy as np
+
+from src.agent.numpy_store import NumpyVectorStore, _Collection, normalize_rows, quantize
+
+
+def embedding_like(size, dim, seed=0):
+    # Normalized Gaussian vectors: components fall in roughly +-4/sqrt(dim), like real embeddings.
+    return normalize_rows(np.random.default_rng(seed).standard_normal((size, dim), dtype=np.float32))
+
+
+def test_int8_codes_use_the_full_range():
+    vectors = embedding_like(2000, 256)
+    codes = quantize(vectors, "int8")
+    assert np.abs(codes).max(axis=0).min() == 127
+    assert len(np.unique(codes)) > 200
+
+
+def test_int8_zero_dimension_does_not_divide_by_zero():
+    vectors = np.array([[0.6, 0.0, 0.8], [-0.8, 0.0, 0.6]], dtype=np.float32)
+    codes = quantize(vectors, "int8")
+    assert codes.tolist() == [[95, 0, 127], [-127, 0, 95]]
+
+
+def test_int8_approximate_scores_track_exact_scores():
+    collection = _Collection(256, quantization="int8")
+    vectors = embedding_like(2000, 256)
+    collection.upsert(list(range(len(vectors))), vectors, [{}] * len(vectors))
+    query = embedding_like(1, 256, seed=1)[0]
+    try:
+        error = np.abs(collection._approximate_scores(query) - vectors @ query).max()
+        assert error < 0.01
+    finally:
+        collection.close()
+
+
+def test_int8_scale_widens_and_reencodes_existing_rows():
+    collection = _Collection(2, quantization="int8")
+    try:
+        collection.upsert(["first"], [[0.1, 1.0]], [{}])
+        first_scale = collection.scale.copy()
+        collection.upsert(["second"], [[1.0, 0.1]], [{}])
+        assert collection.scale[0] > first_scale[0]
+        np.testing.assert_allclose(collection.scale, np.abs(collection.vectors[:2]).max(axis=0))
+        expected = quantize(collection.vectors[:collection.size], "int8", collection.scale)
+        assert collection.codes[:collection.size].tolist() == expected.tolist()
+    finally:
+        collection.close()
+
+
+def test_int8_search_returns_exact_top_k():
+    store = NumpyVectorStore(quantization="int8", oversampling=2)
+    vectors = embedding_like(3000, 128)
+    store.create_collection("docs", 128)
+    for start in range(0, len(vectors), 1000):
+        store.upsert("docs", range(start, start + 1000), vectors[start:start + 1000], [{}] * 1000)
+    try:
+        for query in embedding_like(20, 128, seed=2):
+            expected = np.argsort(-(vectors @ query))[:5].tolist()
+            assert [point.id for point in store.search("docs", query, 5)] == expected
+    finally:
+        store.delete_collection("docs")
+
+
+def test_int8_reencodes_are_amortised_over_many_batches():
+    collection = _Collection(512, quantization="int8")
+    try:
+        for batch in range(150):
+            vectors = embedding_like(64, 512, seed=batch)
+            collection.upsert(list(range(batch * 64, (batch + 1) * 64)), vectors, [{}] * 64)
+        # Re-encodes only once the collection has doubled: at most log2(150) + 1 times.
+        assert collection.requantizations <= 8
+        assert np.all(collection.scale > 0)
+    finally:
+        collection.close()
@@ -0,0 +1,59 @@
+import json
+
+from google.genai import types
+
+from src.agent.streaming import StreamedResponse
+
+
+class FakeEvent:
+    def __init__(self, text="", partial=False, final=False, function_call=False):
+        parts = [types.Part(text=text)] if text else []
+        if function_call:
+            parts.append(types.Part(function_call=types.FunctionCall(name="translate_pdf_tool", args={})))
+        self.content = types.Content(role="model", parts=parts)
+        self.partial = partial
+        self.final = final
+
+    def is_final_response(self):
+        return self.final
+
+
+class FakeRunner:
+    """Replays a fixed list of events for every `run`."""
+
+    def __init__(self, events):
+        self.events = events
+
+    def run(self, **kwargs):
+        yield from self.events
+
+
+def stream(events):
+    response = StreamedResponse(FakeRunner(events), user_id="u", session_id="s", new_message=types.Content(role="user", parts=[types.Part(text="hi")]))
+    return response, list(response.text_chunks())
+
+
+def test_plain_answer_is_streamed():
+    response, chunks = stream([
+        FakeEvent("Hello", partial=True),
+        FakeEvent(" world", partial=True),
+        FakeEvent("Hello world", final=True),
+    ])
+    assert chunks == ["Hello", " world"]
+    assert response.text == "Hello world"
+    assert response.streamed and not response.structured
+
+
+def test_structured_answer_after_streamed_text_and_tool_call_is_buffered():
+    answer = json.dumps({"translate_pdf": True, "model_response": "Translation started.", "job_id": "abc"})
+    response, chunks = stream([
+        FakeEvent("Let me start ", partial=True),
+        FakeEvent("the translation.", partial=True),
+        FakeEvent("Let me start the translation.", function_call=True),
+        FakeEvent(answer[:1], partial=True),
+        FakeEvent(answer[1:], partial=True),
+        FakeEvent(answer, final=True),
+    ])
+    assert chunks == ["Let me start ", "the translation."]
+    assert response.text == answer
+    assert response.structured
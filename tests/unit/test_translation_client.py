@@ -0,0 +1,157 @@
+import asyncio
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.agent import translation_client
+from src.agent.translation_client import (
+    AdaptiveLimiter,
+    TokenBucket,
+    TranslationClient,
+    backoff_delay,
+    is_rate_limit_error,
+    parse_retry_after,
+)
+from tests.fakes import RateLimitError, fake_model
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the bucket's clock; `asyncio.sleep` advances it instead of waiting."""
+    clock = FakeClock()
+    monkeypatch.setattr(translation_client, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(translation_client.asyncio, "sleep", sleep)
+    clock.sleeps = sleeps
+    return clock
+
+
+def test_token_bucket_refills_at_its_rate_up_to_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=60)  # one token per second, capacity 60
+    bucket.tokens = 0
+    clock.now += 10
+    bucket._refill()
+    assert bucket.tokens == pytest.approx(10)
+
+    clock.now += 600
+    bucket._refill()
+    assert bucket.tokens == 60
+
+
+def test_token_bucket_waits_for_missing_tokens(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=5)
+
+    async def run():
+        await bucket.acquire(5)
+        await bucket.acquire(3)
+
+    asyncio.run(run())
+    assert sum(clock.sleeps) == pytest.approx(3)
+    assert bucket.tokens == pytest.approx(0)
+
+
+def test_token_bucket_clamps_oversized_requests_to_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=5)
+    bucket.tokens = 0
+    asyncio.run(bucket.acquire(50))
+    assert sum(clock.sleeps) == pytest.approx(5)
+
+
+def test_token_bucket_with_zero_rate_is_disabled():
+    asyncio.run(TokenBucket(rate_per_minute=0).acquire(10**6))
+
+
+def release_many(limiter, count, rate_limited=False):
+    async def run():
+        for _ in range(count):
+            limiter.in_flight += 1
+            await limiter.release(rate_limited)
+
+    asyncio.run(run())
+
+
+def test_adaptive_limiter_grows_by_about_one_per_window_of_successes():
+    limiter = AdaptiveLimiter(initial=4, maximum=16)
+    release_many(limiter, 4)
+    assert 4.8 < limiter.limit < 5.0
+    release_many(limiter, 5)
+    assert 5.8 < limiter.limit < 6.0
+
+
+def test_adaptive_limiter_halves_on_rate_limits_down_to_the_minimum():
+    limiter = AdaptiveLimiter(initial=8, minimum=2, maximum=16)
+    release_many(limiter, 1, rate_limited=True)
+    assert limiter.limit == 4
+    release_many(limiter, 3, rate_limited=True)
+    assert limiter.limit == 2
+
+
+def test_adaptive_limiter_never_exceeds_its_maximum():
+    limiter = AdaptiveLimiter(initial=3, maximum=4)
+    release_many(limiter, 100)
+    assert limiter.limit == 4
+
+
+def test_rate_limit_errors_are_recognized():
+    assert is_rate_limit_error(RateLimitError("quota"))
+    assert is_rate_limit_error(Exception("429 Resource has been exhausted"))
+    assert is_rate_limit_error(Exception("RESOURCE_EXHAUSTED"))
+    assert not is_rate_limit_error(ValueError("bad JSON"))
+
+
+def test_retry_after_is_read_from_headers_then_message():
+    error = Exception("429")
+    error.response = types.SimpleNamespace(headers={"Retry-After": "7"})
+    assert parse_retry_after(error) == 7.0
+    assert parse_retry_after(Exception("429 Please retry in 12.5s.")) == 12.5
+    assert parse_retry_after(Exception("429 retry_delay { seconds: 31 }")) == 31.0
+    assert parse_retry_after(Exception("500 internal")) is None
+
+
+def test_backoff_never_undercuts_the_retry_hint():
+    for attempt in range(5):
+        assert 0 <= backoff_delay(attempt, base=1.0, cap=8.0) <= 8.0
+        assert 20.0 <= backoff_delay(attempt, base=1.0, retry_after=20.0) <= 21.0
+
+
+def test_client_retries_429s_after_the_server_hint(monkeypatch):
+    hints = []
+
+    def recording_backoff(attempt, base=1.0, cap=60.0, retry_after=None):
+        hints.append(retry_after)
+        return 0.01
+
+    monkeypatch.setattr(translation_client, "backoff_delay", recording_backoff)
+    client = TranslationClient(fake_model(capacity=2, latency=0.02, retry_after=0.5), max_concurrency=8, max_retries=50)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(client.generate_text, [f"block {i}" for i in range(24)]))
+
+    assert results == [f"BLOCK {i}" for i in range(24)]
+    stats = client.stats()
+    assert stats["rate_limited"] > 0
+    assert hints and all(hint == 0.5 for hint in hints)
+    assert stats["concurrency_limit"] < 8
+
+
+def test_client_raises_the_last_error_after_max_retries(monkeypatch):
+    monkeypatch.setattr(translation_client, "backoff_delay", lambda *args, **kwargs: 0.0)
+    client = TranslationClient(fake_model(capacity=0, latency=0.0, retry_after=1.0), max_retries=3)
+
+    with pytest.raises(RateLimitError):
+        client.generate_text("block")
+    assert client.stats()["requests"] == 3
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from src.agent.numpy_store import NumpyVectorStore
+from src.agent.vector_db import VECTORS_FILE, export_collection, import_collection
+
+
+def test_export_import_round_trip(tmp_path):
+    store = NumpyVectorStore(quantization="none")
+    store.create_collection("docs", 4)
+    store.upsert("docs", [1, 2], [[1, 0, 0, 0], [0, 1, 0, 0]], [{"text": "a"}, {"text": "b"}])
+    assert export_collection(store, "docs", str(tmp_path)) == 2
+    assert import_collection(store, "copy", str(tmp_path)) == 2
+    assert store.get_vector_size("copy") == 4
+    assert [point.id for point in store.search("copy", [0, 1, 0, 0], 1)] == [2]
+
+
+def test_empty_collection_keeps_its_vector_size(tmp_path):
+    store = NumpyVectorStore(quantization="none")
+    store.create_collection("docs", 8)
+    assert export_collection(store, "docs", str(tmp_path)) == 0
+    assert np.load(tmp_path / VECTORS_FILE).shape == (0, 8)
+    assert import_collection(store, "copy", str(tmp_path)) == 0
+    assert store.get_vector_size("copy") == 8
+
+
+def test_snapshot_without_vector_size_is_refused(tmp_path):
+    np.save(tmp_path / VECTORS_FILE, np.empty((0, 0), dtype=np.float32))
+    (tmp_path / "payloads.jsonl").write_text("")
+    store = NumpyVectorStore(quantization="none")
+    with pytest.raises(ValueError):
+        import_collection(store, "copy", str(tmp_path))
+    assert not store.collection_exists("copy")